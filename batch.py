@@ -0,0 +1,122 @@
+import argparse
+import glob
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from curate import BUNDLE_FORMATS, bundle_file_name, process_file, profile_path
+from report_sink import report_events_path
+
+
+def curate_one(input_path, output_dir, **options):
+    """
+    Curate one source workbook and move its outputs into ``output_dir`` (next to the input
+    when ``output_dir`` is None). Returns (input, output paths, seconds, error).
+    """
+    started = time.perf_counter()
+    try:
+        dest_file_path, dest_file_name, report_file_path, bundle_file_path = process_file(input_path, **options)
+        target_dir = output_dir or os.path.dirname(os.path.abspath(input_path))
+        stem = os.path.splitext(os.path.basename(input_path))[0]
+        outputs = []
+        if dest_file_path:
+            outputs.append(os.path.join(target_dir, f"{stem}_{dest_file_name}"))
+            shutil.move(dest_file_path, outputs[-1])
+        if bundle_file_path:
+            outputs.append(os.path.join(target_dir, f"{stem}_{bundle_file_name(dest_file_name, options['bundle_format'])}"))
+            shutil.move(bundle_file_path, outputs[-1])
+        if options.get("profile"):
+            outputs.append(os.path.join(target_dir, f"{stem}_curated_finfra1_profile.prof"))
+            shutil.move(profile_path(report_file_path), outputs[-1])
+        shutil.move(report_events_path(report_file_path), os.path.join(target_dir, f"{stem}_curated_finfra1_report.jsonl"))
+        outputs.append(os.path.join(target_dir, f"{stem}_curated_finfra1_report.txt"))
+        shutil.move(report_file_path, outputs[-1])
+        return input_path, outputs, time.perf_counter() - started, None
+    except Exception as error:
+        return input_path, None, time.perf_counter() - started, f"{type(error).__name__}: {error}"
+
+
+def expand_inputs(patterns):
+    """
+    Input paths for the given file names and glob patterns, in order and without duplicates,
+    and the patterns that matched no file.
+    """
+    paths, unmatched = [], []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) or ([pattern] if os.path.isfile(pattern) else [])
+        if not matches:
+            unmatched.append(pattern)
+        for path in matches:
+            # Skip our own outputs and Excel lock files when a glob is re-run over a directory
+            name = os.path.basename(path)
+            if name.startswith("~$") or "_curated_finfra1_" in name:
+                continue
+            if path not in paths:
+                paths.append(path)
+    return paths, unmatched
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Curate FINFRA 1 source workbooks without the Streamlit UI.")
+    parser.add_argument("inputs", nargs="+", help="Input .xlsx files or glob patterns (quote them to let this tool expand '**')")
+    parser.add_argument("-o", "--output-dir", help="Directory for curated workbooks and reports (default: next to each input)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Number of files curated in parallel (default: CPU count)")
+    parser.add_argument("--tab-workers", type=int, default=1, help="Tab builder threads per file (default: 1)")
+    parser.add_argument("--write-only", action="store_true", help="Stream output rows to disk with openpyxl write-only sheets")
+    parser.add_argument("--categorical", action="store_true", help="Hold low-cardinality source columns as categoricals")
+    parser.add_argument("--bundle", choices=BUNDLE_FORMATS, help="Also write every tab as CSV or Parquet in a zip bundle")
+    parser.add_argument("--no-workbook", action="store_true", help="Skip the xlsx output (use with --bundle)")
+    parser.add_argument("--trace-memory", action="store_true", help="Add tracemalloc deltas to the stage timings (slower)")
+    parser.add_argument("--profile", action="store_true", help="Write a cProfile dump per file (<name>_curated_finfra1_profile.prof)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    inputs, unmatched = expand_inputs(args.inputs)
+    if not inputs:
+        print("No input files matched", file=sys.stderr)
+        return 2
+    if args.no_workbook and not args.bundle:
+        print("--no-workbook needs --bundle", file=sys.stderr)
+        return 2
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    options = {
+        "write_only": args.write_only,
+        "max_workers": args.tab_workers,
+        "categorical": args.categorical,
+        "bundle_format": args.bundle,
+        "include_workbook": not args.no_workbook,
+        "trace_memory": args.trace_memory,
+        "profile": args.profile,
+    }
+
+    started = time.perf_counter()
+    # A mistyped path or a glob matching nothing fails the run like a file that failed to curate
+    failures = len(unmatched)
+    for pattern in unmatched:
+        print(f"FAILED {pattern}: matched no file", file=sys.stderr)
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [
+            executor.submit(curate_one, path, args.output_dir, **options)
+            for path in inputs
+        ]
+        for future in futures:
+            input_path, outputs, seconds, error = future.result()
+            if error:
+                failures += 1
+                print(f"FAILED {input_path} ({seconds:.2f}s): {error}", file=sys.stderr)
+            else:
+                print(f"OK     {input_path} -> {', '.join(outputs[:-1])} ({seconds:.2f}s)")
+
+    total = len(inputs) + len(unmatched)
+    print(f"{total - failures}/{total} files curated in {time.perf_counter() - started:.2f}s")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+"""
+Compare the median stage timings of two benchmark result files, e.g. before and after a change.
+
+    python benchmarks/compare_results.py results/base.json results/head.json
+"""
+import argparse
+import json
+import sys
+
+
+def load_summary(path):
+    with open(path, encoding="utf-8") as results:
+        results = json.load(results)
+    return results.get("commit") or path, results["summary"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files stage by stage.")
+    parser.add_argument("base", help="Result JSON to compare against")
+    parser.add_argument("head", help="Result JSON of the change")
+    args = parser.parse_args(argv)
+
+    base_name, base = load_summary(args.base)
+    head_name, head = load_summary(args.head)
+    print(f"base: {base_name}\nhead: {head_name}\n")
+    print(f"{'rows':>8}  {'stage':<45} {'base s':>9} {'head s':>9} {'ratio':>7}")
+    for rows in sorted(set(base) & set(head), key=int):
+        stages = list(base[rows]) + [stage for stage in head[rows] if stage not in base[rows]]
+        for stage in stages:
+            before, after = base[rows].get(stage), head[rows].get(stage)
+            ratio = f"{after / before:7.2f}" if before and after is not None else f"{'-':>7}"
+            before = f"{before:9.3f}" if before is not None else f"{'-':>9}"
+            after = f"{after:9.3f}" if after is not None else f"{'-':>9}"
+            print(f"{rows:>8}  {stage:<45} {before} {after} {ratio}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""
+Synthetic FINFRA 1 source workbooks for benchmarking: one "Sheet1" with every column the
+curation pipeline consumes, with value distributions modelled on the vendor drops (mapped and
+unmapped values, blanks, "0"/"n/a" sentinels, multi-token geographies, interim closes).
+
+    python benchmarks/generate_source.py 100000 benchmarks/data/source_100000.xlsx
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+from openpyxl import Workbook
+
+MAPPINGS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "mappings.json")
+
+BENCHMARK_SIZES = [1000, 10000, 100000, 1000000]
+
+CLOSE_STATUSES = ["First Close", "Second Close", "Third Close", "Fourth Close", "Fifth Close", "Sixth Close", "Seventh Close"]
+
+# Most funds in a drop have closed; later interim closes get rarer
+STATUS_WEIGHTS = {
+    "Closed": 0.33, "Raising": 0.12, "Open Ended": 0.09, "Liquidated": 0.07, "Estimated": 0.05, "Evergreen": 0.04,
+    "Semi-Open Ended": 0.03, "Open ended (Liquidated)": 0.02, "Open-Ended (Liquidated)": 0.02, "Listed": 0.02,
+    "Final Close": 0.02, "Launched": 0.02, "First Close": 0.06, "Second Close": 0.03, "Third Close": 0.02,
+    "Fourth Close": 0.01, "Fifth Close": 0.005, "Sixth Close": 0.003, "Seventh Close": 0.002,
+}
+
+MANAGER_WORDS = ["Global", "Capital", "Partners", "Infrastructure", "Asset", "Management", "Investors", "Energy",
+                 "Transition", "Harbour", "Summit", "Meridian", "Atlas", "Northern", "Pacific", "Sterling"]
+FUND_WORDS = ["Infrastructure", "Core Infrastructure", "Renewables", "Energy Transition", "Digital Infrastructure",
+              "Real Assets", "Transport", "Social Infrastructure", "Debt", "Opportunities"]
+SERVICE_PROVIDERS = ["KPMG", "PwC", "Deloitte", "EY", "Grant Thornton", "BDO", "Kirkland & Ellis", "Clifford Chance",
+                     "Linklaters", "Allen & Overy", "Campbell Lutyens", "Park Hill", "Evercore", "Credit Suisse",
+                     "Alter Domus", "IQ-EQ", "Citco", "State Street", "Northern Trust", "Aztec"]
+
+# Source columns in vendor order
+COLUMNS = [
+    "NAME", "FUND MANAGER", "FUND CURRENCY", "VINTAGE / INCEPTION YEAR", "STATUS", "STRATEGY", "ASSET CLASS",
+    "FUND STRUCTURE", "FUND NUMBER (OVERALL)", "FUND NUMBER (SERIES)", "LIFESPAN (YEARS)", "LIFESPAN EXTENSION",
+    "TARGET SIZE (CURR. MN)", "INITIAL TARGET (CURR. MN)", "HARD CAP (CURR. MN)",
+    "OFFER CO-INVESTMENT OPPORTUNITIES TO LPS?", "FUND LEGAL STRUCTURE", "TIMES TO FIRST CLOSE",
+    "TOTAL MONTHS IN MARKET", "FUND RAISING LAUNCH DATE", "LATEST INTERIM CLOSE DATE",
+    "LATEST INTERIM CLOSE SIZE (CURR. MN)", "FINAL CLOSE DATE", "FINAL CLOSE SIZE (CURR. MN)",
+    "TARGET IRR - NET MIN", "TARGET IRR - NET MAX", "TARGET IRR - GROSS MIN", "TARGET IRR - GROSS MAX",
+    "DOMICILE", "PRIMARY REGION FOCUS", "GEOGRAPHIC EXPOSURE", "INF: PRIMARY SECTOR",
+    "PLACEMENT AGENTS", "LAW FIRMS", "AUDITORS", "ADMINISTRATORS",
+]
+
+
+def load_tables():
+    with open(MAPPINGS_PATH, encoding="utf-8") as artifact:
+        return json.load(artifact)["tables"]
+
+
+def pick(rng, n, values, weights=None, blank=0.0):
+    """
+    ``n`` draws from ``values`` (Zipf-like weights unless given), with a ``blank`` share of Nones.
+    """
+    values = list(values)
+    if weights is None:
+        weights = 1.0 / np.arange(1, len(values) + 1)
+    weights = np.asarray(weights, dtype=float)
+    choices = np.empty(len(values) + 1, dtype=object)
+    choices[:-1] = values
+    choices[-1] = None
+    probabilities = np.append(weights / weights.sum() * (1 - blank), blank)
+    return choices[rng.choice(len(choices), size=n, p=probabilities)]
+
+
+def blank_out(rng, values, share):
+    values = values.astype(object)
+    values[rng.random(len(values)) < share] = None
+    return values
+
+
+def dates_between(rng, n, start, end):
+    days = rng.integers(0, (end - start).days, size=n)
+    return np.array([start + timedelta(days=int(day)) for day in days], dtype=object)
+
+
+def role_companies(rng, n, not_used):
+    # Single providers, "Not Used"/"Used but Not Specified" markers, comma lists (dropped by Roles) and blanks
+    singles = pick(rng, n, SERVICE_PROVIDERS)
+    pairs = np.array([f"{a}, {b}" for a, b in zip(singles, np.roll(singles, 1))], dtype=object)
+    kind = rng.random(n)
+    companies = np.where(kind < not_used, "Not Used", singles)
+    companies = np.where((kind >= not_used) & (kind < not_used + 0.05), "Used but Not Specified", companies)
+    companies = np.where((kind >= 0.85) & (kind < 0.92), pairs, companies).astype(object)
+    companies[kind >= 0.92] = None
+    return companies
+
+
+def generate_columns(n, seed=0, extra_columns=0):
+    """
+    Column name -> object array of ``n`` synthetic source values. ``extra_columns`` appends
+    columns no tab reads, as the full vendor exports carry (200+ columns).
+    """
+    rng = np.random.default_rng(seed)
+    tables = load_tables()
+
+    managers = np.array([
+        f"{MANAGER_WORDS[a]} {MANAGER_WORDS[b]} {suffix}"
+        for a, b, suffix in zip(rng.integers(0, len(MANAGER_WORDS), 2000), rng.integers(0, len(MANAGER_WORDS), 2000),
+                                rng.choice(["LLP", "LP", "Ltd", "GmbH", "SA", "Inc"], 2000))
+    ], dtype=object)
+    manager = managers[rng.zipf(1.3, size=n) % len(managers)]
+    fund_number = np.minimum(rng.geometric(0.35, size=n), 15)
+    names = np.array([
+        f"{gp} {FUND_WORDS[word]} Fund {number} ({i})"
+        for i, (gp, word, number) in enumerate(zip(manager, rng.integers(0, len(FUND_WORDS), n), fund_number))
+    ], dtype=object)
+
+    status = pick(rng, n, STATUS_WEIGHTS, list(STATUS_WEIGHTS.values()), blank=0.03)
+    closed = np.isin(status, ["Closed", "Final Close", "Liquidated", "Open-Ended (Liquidated)"])
+    interim = np.isin(status, CLOSE_STATUSES)
+
+    target = np.round(rng.lognormal(6.2, 1.1, size=n), 1)
+    launch = dates_between(rng, n, datetime(2003, 1, 1), datetime(2025, 6, 30))
+    months_in_market = rng.integers(3, 48, size=n)
+    final_close = np.array([day + timedelta(days=int(months) * 30) for day, months in zip(launch, months_in_market)], dtype=object)
+    interim_close = np.array([day + timedelta(days=int(months) * 15) for day, months in zip(launch, months_in_market)], dtype=object)
+
+    # Target IRRs are mostly missing, and min and max are reported together
+    irr_gross, irr_gross_blank = rng.integers(6, 16, size=n), rng.random(n) < 0.7
+    irr_net, irr_net_blank = rng.integers(4, 13, size=n), rng.random(n) < 0.75
+
+    geography_tokens = list(tables["geographies"]) + ["Western Europe", "United States", "Australia", "Global", "Asia"]
+    exposure_counts = rng.choice([1, 2, 3, 4], size=n, p=[0.5, 0.25, 0.15, 0.1])
+    tokens = pick(rng, int(exposure_counts.sum()), geography_tokens)
+    splits = np.split(tokens, np.cumsum(exposure_counts)[:-1])
+    exposure = blank_out(rng, np.array([", ".join(group) for group in splits], dtype=object), 0.05)
+
+    domicile_values = list(tables["domicile"]) + sorted(set(tables["domicile"].values()))
+    sector_values = list(tables["primary_sector"]) + ["Renewable Energy", "Transport", "Diversified", "Data Centres"]
+
+    columns = {
+        "NAME": names,
+        "FUND MANAGER": manager,
+        "FUND CURRENCY": pick(rng, n, ["USD", "EUR", "GBP", "AUD", "CAD", "0"], [0.55, 0.28, 0.08, 0.03, 0.02, 0.04]),
+        "VINTAGE / INCEPTION YEAR": blank_out(rng, rng.integers(2000, 2026, size=n), 0.1),
+        "STATUS": status,
+        "STRATEGY": pick(rng, n, tables["fund_style"], blank=0.05),
+        "ASSET CLASS": pick(rng, n, ["Infrastructure", "Real Estate", "Multi"], [0.7, 0.2, 0.1]),
+        "FUND STRUCTURE": pick(rng, n, tables["separate_account"], [0.9, 0.1], blank=0.05),
+        "FUND NUMBER (OVERALL)": fund_number.astype(object),
+        "FUND NUMBER (SERIES)": blank_out(rng, np.minimum(rng.geometric(0.45, size=n), 10), 0.2),
+        "LIFESPAN (YEARS)": pick(rng, n, [10, 12, 15, 7, 99], blank=0.3),
+        "LIFESPAN EXTENSION": pick(rng, n, ["1+1", "2", "1+1+1", "3"], blank=0.4),
+        "TARGET SIZE (CURR. MN)": blank_out(rng, target, 0.15),
+        "INITIAL TARGET (CURR. MN)": blank_out(rng, np.round(target * 0.8, 1), 0.6),
+        "HARD CAP (CURR. MN)": blank_out(rng, np.round(target * 1.25, 1), 0.5),
+        "OFFER CO-INVESTMENT OPPORTUNITIES TO LPS?": pick(rng, n, ["Yes", "No"], blank=0.6),
+        "FUND LEGAL STRUCTURE": pick(rng, n, ["Limited Partnership", "SICAV", "SCSp", "LLC", "n/a", "nan"], blank=0.2),
+        "TIMES TO FIRST CLOSE": blank_out(rng, rng.integers(1, 24, size=n), 0.5),
+        "TOTAL MONTHS IN MARKET": blank_out(rng, months_in_market, 0.3),
+        "FUND RAISING LAUNCH DATE": blank_out(rng, launch, 0.2),
+        "LATEST INTERIM CLOSE DATE": np.where(interim, interim_close, None),
+        "LATEST INTERIM CLOSE SIZE (CURR. MN)": np.where(interim, np.round(target * 0.4, 1), None),
+        "FINAL CLOSE DATE": np.where(closed, final_close, None),
+        "FINAL CLOSE SIZE (CURR. MN)": np.where(closed, np.round(target * rng.uniform(0.6, 1.3, size=n), 1), None),
+        "TARGET IRR - NET MIN": np.where(irr_net_blank, None, irr_net),
+        "TARGET IRR - NET MAX": np.where(irr_net_blank, None, irr_net + 3),
+        "TARGET IRR - GROSS MIN": np.where(irr_gross_blank, None, irr_gross),
+        "TARGET IRR - GROSS MAX": np.where(irr_gross_blank, None, irr_gross + 4),
+        "DOMICILE": pick(rng, n, domicile_values + ["n/a"], blank=0.05),
+        "PRIMARY REGION FOCUS": pick(rng, n, list(tables["primary_region"]) + ["Europe", "North America", "Asia"], blank=0.05),
+        "GEOGRAPHIC EXPOSURE": exposure,
+        "INF: PRIMARY SECTOR": pick(rng, n, sector_values, blank=0.1),
+        "PLACEMENT AGENTS": role_companies(rng, n, not_used=0.35),
+        "LAW FIRMS": role_companies(rng, n, not_used=0.1),
+        "AUDITORS": role_companies(rng, n, not_used=0.05),
+        "ADMINISTRATORS": role_companies(rng, n, not_used=0.1),
+    }
+    columns = {column: columns[column] for column in COLUMNS}
+    for extra in range(extra_columns):
+        if extra % 3 == 0:
+            columns[f"EXTRA METRIC {extra}"] = blank_out(rng, np.round(rng.lognormal(3, 1, size=n), 2), 0.4)
+        else:
+            columns[f"EXTRA FIELD {extra}"] = pick(rng, n, [f"Value {value}" for value in range(20)] + ["0", "n/a"], blank=0.3)
+    return columns
+
+
+def write_source_workbook(n, path, seed=0, extra_columns=0):
+    """
+    Write an ``n``-row synthetic source workbook to ``path``, streaming rows with a write-only book.
+    """
+    columns = generate_columns(n, seed, extra_columns)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Sheet1")
+    sheet.append(list(columns))
+    for row in zip(*columns.values()):
+        sheet.append([value.item() if isinstance(value, np.generic) else value for value in row])
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    workbook.save(path)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic FINFRA 1 source workbook.")
+    parser.add_argument("rows", type=int, help=f"Number of fund rows (the benchmarks use {', '.join(map(str, BENCHMARK_SIZES))})")
+    parser.add_argument("output", help="Path of the .xlsx to write")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--extra-columns", type=int, default=0, help="Unused columns to append, as in full vendor exports (default: 0)")
+    args = parser.parse_args(argv)
+    write_source_workbook(args.rows, args.output, args.seed, args.extra_columns)
+    print(args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
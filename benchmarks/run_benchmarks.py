@@ -0,0 +1,152 @@
+"""
+Time the curation pipeline on synthetic source workbooks of increasing size. Every stage
+(ingestion, clean_specific_values, each create_*_tab, output writing) is taken from the run's
+stage timings; results are saved as JSON and CSV for comparing commits with compare_results.py.
+
+    python benchmarks/run_benchmarks.py --sizes 1000 10000 100000 --repeat 3
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import openpyxl  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from curate import process_file, remove_outputs  # noqa: E402
+from generate_source import BENCHMARK_SIZES, write_source_workbook  # noqa: E402
+from report_sink import read_events  # noqa: E402
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CSV_FIELDS = ["rows", "repeat", "stage", "wall_s", "cpu_s", "peak_rss_mb", "traced_delta_mb", "stage_rows"]
+
+
+def git_revision():
+    # (commit, dirty) of the tree being measured, or (None, None) outside a git checkout
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_DIR,
+                                capture_output=True, text=True, check=True).stdout
+        return commit, bool(status.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def source_workbook(rows, data_dir, seed, extra_columns):
+    # Generated workbooks are kept between runs; the 1M-row one takes minutes to write
+    path = os.path.join(data_dir, f"source_{rows}_seed{seed}_extra{extra_columns}.xlsx")
+    if not os.path.exists(path):
+        print(f"Generating {rows} rows -> {path}", flush=True)
+        write_source_workbook(rows, path, seed, extra_columns)
+    return path
+
+
+def run_once(path, options):
+    started = time.perf_counter()
+    outputs = process_file(path, **options)
+    total = time.perf_counter() - started
+    stages = [{key: value for key, value in event.items() if key != "event"} for event in read_events(outputs[2], "timing")]
+    remove_outputs(outputs)
+    return total, stages
+
+
+def summarize(runs):
+    """
+    Median wall seconds per size and stage, plus the whole run as "total".
+    """
+    samples = {}
+    for run in runs:
+        by_stage = samples.setdefault(str(run["rows"]), {})
+        by_stage.setdefault("total", []).append(run["total_s"])
+        for stage in run["stages"]:
+            by_stage.setdefault(stage["stage"], []).append(stage["wall_s"])
+    return {rows: {stage: statistics.median(values) for stage, values in by_stage.items()} for rows, by_stage in samples.items()}
+
+
+def write_csv(runs, path):
+    with open(path, "w", newline="", encoding="utf-8") as results:
+        writer = csv.DictWriter(results, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for run in runs:
+            writer.writerow({"rows": run["rows"], "repeat": run["repeat"], "stage": "total", "wall_s": run["total_s"]})
+            for stage in run["stages"]:
+                writer.writerow({
+                    "rows": run["rows"], "repeat": run["repeat"], "stage": stage["stage"], "wall_s": stage["wall_s"],
+                    "cpu_s": stage["cpu_s"], "peak_rss_mb": stage.get("peak_rss_mb"),
+                    "traced_delta_mb": stage.get("traced_delta_mb"), "stage_rows": stage.get("rows"),
+                })
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the FINFRA 1 curation pipeline on synthetic sources.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=BENCHMARK_SIZES,
+                        help=f"Source row counts (default: {' '.join(map(str, BENCHMARK_SIZES))})")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per size; the summary keeps the median (default: 3)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generated sources (default: 0)")
+    parser.add_argument("--extra-columns", type=int, default=0, help="Unused columns in the generated sources (default: 0)")
+    parser.add_argument("--data-dir", default=os.path.join(BENCHMARKS_DIR, "data"), help="Where generated sources are kept")
+    parser.add_argument("--output-dir", default=os.path.join(BENCHMARKS_DIR, "results"), help="Where results are written")
+    parser.add_argument("--tab-workers", type=int, default=1,
+                        help="Tab builder threads (default: 1, so every builder is timed on its own)")
+    parser.add_argument("--write-only", action="store_true", help="Write the workbook with openpyxl write-only sheets")
+    parser.add_argument("--categorical", action="store_true", help="Hold low-cardinality source columns as categoricals")
+    parser.add_argument("--bundle", choices=["csv", "parquet"], help="Also time the tab bundle export")
+    parser.add_argument("--trace-memory", action="store_true", help="Record tracemalloc deltas (slows every stage)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    options = {
+        "max_workers": args.tab_workers,
+        "write_only": args.write_only,
+        "categorical": args.categorical,
+        "bundle_format": args.bundle,
+        "trace_memory": args.trace_memory,
+    }
+    commit, dirty = git_revision()
+
+    runs = []
+    for rows in args.sizes:
+        path = source_workbook(rows, args.data_dir, args.seed, args.extra_columns)
+        for repeat in range(args.repeat):
+            total, stages = run_once(path, options)
+            runs.append({"rows": rows, "repeat": repeat, "total_s": total, "stages": stages})
+            print(f"{rows:>8} rows, run {repeat + 1}/{args.repeat}: {total:.2f}s", flush=True)
+
+    results = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "dirty": dirty,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "openpyxl": openpyxl.__version__,
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "extra_columns": args.extra_columns,
+        "options": options,
+        "summary": summarize(runs),
+        "runs": runs,
+    }
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    stem = os.path.join(args.output_dir, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{(commit or 'nogit')[:10]}")
+    with open(f"{stem}.json", "w", encoding="utf-8") as results_file:
+        json.dump(results, results_file, indent=2)
+    write_csv(runs, f"{stem}.csv")
+    print(f"{stem}.json")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
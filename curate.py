@@ -0,0 +1,1300 @@
+import pandas as pd
+import numpy as np
+import tempfile
+import io
+import zipfile
+import hashlib
+import json
+import os
+from collections import namedtuple
+from itertools import chain, islice, repeat
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+from pandas.io.parsers import TextParser
+from openpyxl.styles import Alignment
+from openpyxl.utils import column_index_from_string, get_column_letter
+from output_spool import spooled_file
+from report_sink import ReportSink, report_events_path
+from instrumentation import StageTimer
+
+# Utility Functions
+def constant_column(value, index):
+    """
+    A column holding ``value`` on every row without materialising it per row: a single-category
+    Categorical whose codes are a broadcast (zero-stride) view. Writers expand it only as rows
+    are emitted (see column_values).
+    """
+    codes = np.broadcast_to(np.int8(0), (len(index),))
+    return pd.Series(pd.Categorical.from_codes(codes, categories=[value]), index=index, copy=False)
+
+def copy_columns(source_df, mapping, additional_values=None):
+    """
+    The tab's columns as views of the shared source columns; nothing is copied, and copy-on-write
+    keeps ``source_df`` intact when a tab modifies its column. Columns missing from the source
+    are constant columns of their ``additional_values`` value (blank by default). When none of the
+    mapped columns is in the source, the tab has no rows.
+    """
+    present = any(source_col in source_df.columns for source_col in mapping)
+    index = source_df.index if present else source_df.index[:0]
+    columns = {}
+    for source_col, dest_col in mapping.items():
+        if source_col in source_df.columns:
+            columns[dest_col] = source_df[source_col]
+        else:
+            value = additional_values.get(dest_col, "") if additional_values else ""
+            columns[dest_col] = constant_column(value, index)
+    return pd.DataFrame(columns, index=index, copy=False)
+
+def flag_column(mask, index):
+    # "TRUE" where ``mask`` holds, blank elsewhere, as one byte per row instead of a string per row
+    codes = np.asarray(mask, dtype=np.int8)
+    return pd.Series(pd.Categorical.from_codes(codes, categories=["", "TRUE"]), index=index, copy=False)
+
+PERFORMANCE_DATA_MAPPING = {
+    "NAME": "Fund",
+    "": "Performance Date",
+    "TARGET IRR - GROSS MIN": "Performance Value (Min)",
+    "TARGET IRR - GROSS MAX": "Performance Value (Max)",
+    "": "Fund Performance Measurement Type",
+    "": "Fund Performance Measurement Unit",
+    "": "Performance Source",
+    "": "Confidential"
+}
+
+def append_performance_data(sheets, source_df, startrow, report):
+    additional_values = {
+        "Fund Performance Measurement Unit": "Percentage",
+        "Fund Performance Measurement Type": "Target IRR (Gross) (%)"
+    }
+    
+    performance_df = copy_columns(source_df, PERFORMANCE_DATA_MAPPING, additional_values)
+    
+    performance_df['Performance Source'] = constant_column("", performance_df.index)
+    performance_df['Confidential'] = constant_column("", performance_df.index)
+
+    # Ensure the correct order of columns and insertion if necessary
+    measurement_type = constant_column("Target IRR (Gross) (%)", performance_df.index)
+    if 'Fund Performance Measurement Type' not in performance_df.columns:
+        performance_df.insert(2, 'Fund Performance Measurement Type', measurement_type)
+    else:
+        performance_df['Fund Performance Measurement Type'] = measurement_type
+    
+    measurement_unit = constant_column("Percentage", performance_df.index)
+    if 'Fund Performance Measurement Unit' not in performance_df.columns:
+        performance_df.insert(3, 'Fund Performance Measurement Unit', measurement_unit)
+    else:
+        performance_df['Fund Performance Measurement Unit'] = measurement_unit
+
+    if not performance_df.empty:
+        write_frame(sheets, performance_df, 'Performances', startrow=startrow, header=False)
+        report.append(f"Target IRR (Gross) (%) data => from row {startrow + 1}\n")
+        startrow += len(performance_df)
+    
+    return startrow
+
+# Column widths are measured on a sample of rows for tabs longer than this
+WIDTH_SAMPLE_ROWS = 50000
+
+def text_widths(df, header=True):
+    """
+    Longest text value per column position. Only string cells count, as in Excel's own autofit
+    of text; numbers, dates and blanks are ignored.
+    """
+    if len(df) > WIDTH_SAMPLE_ROWS:
+        df = df.sample(n=WIDTH_SAMPLE_ROWS, random_state=0)
+    widths = []
+    for position, col in enumerate(df.columns):
+        try:
+            longest = df.iloc[:, position].str.len().max()
+        except AttributeError:
+            longest = 0  # no string values in this column
+        longest = 0 if pd.isna(longest) else int(longest)
+        if header and isinstance(col, str):
+            longest = max(longest, len(col))
+        widths.append(longest)
+    return widths
+
+def write_frame(sheets, df, sheet_name, startrow=0, header=True):
+    # Tabs are collected as (startrow, header, frame) pieces and written in one go by save_workbook
+    sheets.setdefault(sheet_name, []).append((startrow, header, df))
+
+def sheet_column_widths(pieces):
+    widths = []
+    for _, header, df in pieces:
+        for position, width in enumerate(text_widths(df, header)):
+            if position < len(widths):
+                widths[position] = max(widths[position], width)
+            else:
+                widths.append(width)
+    return widths
+
+def autofit_columns(workbook, column_widths):
+    for sheet_name in workbook.sheetnames:
+        sheet = workbook[sheet_name]
+        for cell in sheet[1]:
+            cell.alignment = Alignment(horizontal='left')  # Align header left
+        for position, max_length in enumerate(column_widths.get(sheet_name, [])):
+            sheet.column_dimensions[get_column_letter(position + 1)].width = max_length + 2
+
+def save_workbook(sheets, path, column_widths):
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        if not sheets:
+            writer.book.create_sheet('Dummy')
+        for sheet_name, pieces in sheets.items():
+            for startrow, header, df in pieces:
+                df.to_excel(writer, sheet_name=sheet_name, index=False, header=header, startrow=startrow)
+
+        # Auto-fit on the in-memory book, so the output is saved exactly once when the writer closes
+        autofit_columns(writer.book, column_widths)
+
+def column_values(column):
+    # Constant columns are repeated row by row instead of expanded up front
+    if isinstance(column.dtype, pd.CategoricalDtype) and len(column.cat.categories) == 1 and not column.hasnans:
+        return repeat(column.cat.categories[0], len(column))
+    return column
+
+def stream_rows(sheet, df, header):
+    if header:
+        header_cells = []
+        for col in df.columns:
+            cell = WriteOnlyCell(sheet, value=col)
+            cell.alignment = Alignment(horizontal='left')  # Align header left
+            header_cells.append(cell)
+        yield header_cells
+    for row in zip(*(column_values(df.iloc[:, position]) for position in range(len(df.columns)))):
+        values = []
+        for value in row:
+            if isinstance(value, datetime):
+                value = WriteOnlyCell(sheet, value=value)
+                value.number_format = 'YYYY-MM-DD HH:MM:SS'  # pandas' default datetime_format
+            elif pd.api.types.is_scalar(value) and pd.isna(value):
+                value = None
+            values.append(value)
+        yield values
+
+def save_workbook_streaming(sheets, path, column_widths):
+    """
+    Write the collected tabs with openpyxl write-only worksheets. Rows are streamed to disk one
+    at a time, so no Cell objects are kept for the whole workbook. Matches save_workbook's output.
+    """
+    workbook = Workbook(write_only=True)
+    if not sheets:
+        workbook.create_sheet('Dummy')
+    for sheet_name, pieces in sheets.items():
+        sheet = workbook.create_sheet(sheet_name)
+        # Widths have to be set before the first row is streamed
+        for position, max_length in enumerate(column_widths.get(sheet_name, [])):
+            sheet.column_dimensions[get_column_letter(position + 1)].width = max_length + 2
+
+        next_row = 0
+        for startrow, header, df in sorted(pieces, key=lambda piece: piece[0]):
+            if startrow < next_row:
+                raise ValueError(f"Overlapping rows in '{sheet_name}' cannot be streamed")
+            for _ in range(startrow - next_row):
+                sheet.append([])
+            for values in stream_rows(sheet, df, header):
+                sheet.append(values)
+            next_row = startrow + len(df) + (1 if header else 0)
+    workbook.save(path)
+
+# Columnar export formats for the tab bundle
+BUNDLE_FORMATS = ["csv", "parquet"]
+
+def bundle_file_name(dest_file_name, bundle_format):
+    return dest_file_name.replace('.xlsx', f'_{bundle_format}.zip')
+
+def assemble_sheet(pieces):
+    """
+    One DataFrame holding a tab's grid as written to Excel: headerless pieces are lined up
+    under the header by column position.
+    """
+    pieces = sorted(pieces, key=lambda piece: piece[0])
+    columns = list(pieces[0][2].columns)
+    frames = []
+    for _, header, df in pieces:
+        if not header:
+            columns += [f"Column {position + 1}" for position in range(len(columns), len(df.columns))]
+            df = df.set_axis(columns[:len(df.columns)], axis=1)
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True).reindex(columns=columns) if len(frames) > 1 else frames[0]
+
+def parquet_safe(df):
+    # Parquet needs one type per column; mixed text/number/date columns are written as text
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == object and pd.api.types.infer_dtype(df[col], skipna=True).startswith("mixed"):
+            df[col] = df[col].map(lambda value: value if pd.isna(value) else str(value))
+    return df
+
+def export_bundle(sheets, path, bundle_format):
+    """
+    Write every tab to a zip of CSV or Parquet files, one per tab, for loaders that do not
+    need the workbook. Parquet needs pyarrow (or fastparquet) installed.
+    """
+    if bundle_format not in BUNDLE_FORMATS:
+        raise ValueError(f"Unknown bundle format '{bundle_format}', expected one of {BUNDLE_FORMATS}")
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as bundle:
+        for sheet_name, pieces in sheets.items():
+            df = assemble_sheet(pieces)
+            if bundle_format == "csv":
+                with bundle.open(f"{sheet_name}.csv", 'w') as entry:
+                    with io.TextIOWrapper(entry, encoding='utf-8', newline='') as text:
+                        df.to_csv(text, index=False)
+            else:
+                buffer = io.BytesIO()
+                parquet_safe(df).to_parquet(buffer, index=False)
+                bundle.writestr(f"{sheet_name}.parquet", buffer.getvalue())
+
+def append_roles(sheets, source_df, role_column, role_name, startrow, report):
+    roles_data = {
+        "Fund": source_df["NAME"],
+        "Company": source_df.get(role_column, ""),
+        "Role": role_name
+    }
+    roles_df_add = pd.DataFrame(roles_data)
+    write_frame(sheets, roles_df_add, 'Roles', startrow=startrow, header=False)
+    report.append(f"{role_name} data => from row {startrow + 1}\n")
+    return startrow + len(roles_df_add)
+
+def record_replacement(report, tab, column, original, replacement, count, rows):
+    report.replacement(tab, column, original, replacement, count, rows[:6])
+
+# Mapping tables
+MAPPINGS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mappings.json")
+MAPPING_TABLES = [
+    "fund_status", "fund_style", "asset_class", "separate_account",
+    "domicile", "primary_region", "geographies", "primary_sector",
+]
+
+# A replacement table resolved for lookups: for every key, the value it ends up with and the
+# keys it passes through when the table is applied one key at a time in order
+CompiledMapping = namedtuple("CompiledMapping", ["replacements", "index", "final_values", "hit_keys"])
+
+def compile_mapping(replacements):
+    final_values, hit_keys = [], []
+    for key in replacements:
+        current, hits = key, []
+        for original, replacement in replacements.items():
+            if current == original:
+                hits.append(original)
+                current = replacement
+        final_values.append(current)
+        hit_keys.append(tuple(hits))
+    return CompiledMapping(
+        dict(replacements), pd.Index(list(replacements), dtype=object), np.array(final_values, dtype=object), hit_keys
+    )
+
+def reject_duplicate_keys(pairs):
+    keys = [key for key, _ in pairs]
+    duplicates = sorted({key for key in keys if keys.count(key) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate keys in mapping artifact: {duplicates}")
+    return dict(pairs)
+
+def load_mappings(path=MAPPINGS_PATH):
+    """
+    Load, validate and compile the versioned mapping artifact. Returns the version (the declared
+    version plus a content hash, so any edit invalidates cached results) and the compiled tables.
+    """
+    with open(path, 'rb') as mappings_file:
+        content = mappings_file.read()
+    artifact = json.loads(content, object_pairs_hook=reject_duplicate_keys)
+
+    tables = artifact.get("tables", {})
+    missing = [name for name in MAPPING_TABLES if name not in tables]
+    if not artifact.get("version") or missing:
+        raise ValueError(f"{path} needs a version and the tables {MAPPING_TABLES} (missing: {missing})")
+    for name, table in tables.items():
+        if not all(isinstance(key, str) and isinstance(value, str) for key, value in table.items()):
+            raise ValueError(f"Table '{name}' in {path} must map strings to strings")
+
+    version = f"{artifact['version']}-{hashlib.sha256(content).hexdigest()[:12]}"
+    return version, {name: compile_mapping(table) for name, table in tables.items()}
+
+# Loaded once per process and shared by every tab builder
+MAPPINGS_VERSION, MAPPINGS = load_mappings()
+
+def apply_replacements(series, mapping, notes):
+    """
+    Apply a compiled replacement table to a column in a single vectorized pass.
+
+    The result matches calling ``series.replace(original, replacement)`` once per key in table
+    order, including chained keys (e.g. 'England' -> 'United Kingdom' followed by
+    'United Kingdom' -> 'United Kingdom'). Only the distinct values are looked up, and ``notes``
+    is filled with ``{original: (replacement, count, rows, column)}`` from one groupby over the value
+    codes. Only the first six rows are kept per note, which is all record_replacement needs.
+    """
+    categorical = isinstance(series.dtype, pd.CategoricalDtype)
+    if categorical:
+        # Categorical columns are mapped per category rather than per row
+        codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+    else:
+        codes, uniques = pd.factorize(series)
+    positions = mapping.index.get_indexer(uniques)
+    matched = np.flatnonzero(positions >= 0)
+    if len(matched) == 0:
+        return series
+
+    final_values = np.empty(len(uniques) + 1, dtype=object)
+    final_values[:-1] = uniques
+    final_values[-1] = np.nan
+    final_values[matched] = mapping.final_values[positions[matched]]
+
+    # Distinct values behind each key of the table
+    hits = {}
+    for code in matched:
+        for original in mapping.hit_keys[positions[code]]:
+            hits.setdefault(original, []).append(code)
+
+    # Count and first rows of every distinct value from a single groupby
+    valid = codes >= 0
+    counts = np.bincount(codes[valid], minlength=len(uniques))
+    row_positions = np.flatnonzero(valid)
+    if not series.index.is_unique:
+        # An exploded column repeats a row's label once per token: one position per value and row
+        repeats = pd.DataFrame({"code": codes[row_positions], "row": series.index[row_positions]}).duplicated()
+        row_positions = row_positions[~repeats.to_numpy()]
+    first_positions = pd.Series(row_positions).groupby(codes[row_positions]).head(6)
+    first_rows = first_positions.groupby(codes[first_positions.to_numpy()]).agg(list)
+
+    for original in mapping.replacements:
+        # Unused categories have no rows and are not reported
+        count = int(counts[hits[original]].sum()) if original in hits else 0
+        if count > 0:
+            positions_hit = sorted(p for code in hits[original] for p in first_rows.get(code, []))
+            # Chained keys can reach one row through several values
+            rows = list(dict.fromkeys(series.index[positions_hit].tolist()))[:6]
+            notes[original] = (mapping.replacements[original], count, rows, series.name)
+
+    if categorical:
+        # Merge categories that now share a value and recode
+        recode, new_categories = pd.factorize(final_values[:-1])
+        new_codes = np.where(codes >= 0, recode[codes], -1)
+        return pd.Series(pd.Categorical.from_codes(new_codes, categories=new_categories), index=series.index, name=series.name)
+
+    # Codes of -1 (missing values) pick the trailing NaN
+    return pd.Series(final_values[codes], index=series.index, name=series.name)
+
+def replace_geography_tokens(series, mapping, notes):
+    """
+    Map every comma-separated token of a column through a compiled replacement table. Each distinct string
+    is split and translated once; ``notes`` gets per-token counts from an exploded view, with each
+    row listed once however many of its tokens matched.
+    """
+    codes, uniques = pd.factorize(series)
+    if len(uniques) == 0:
+        return series
+
+    token_lists = [[geo.strip() for geo in geographies.split(',')] for geographies in uniques]
+    translated = np.empty(len(uniques) + 1, dtype=object)
+    translated[:-1] = [', '.join(mapping.replacements.get(geo, geo) for geo in tokens) for tokens in token_lists]
+    translated[-1] = np.nan
+
+    # One token per row entry, indexed by the row it came from
+    valid = codes >= 0
+    tokens = pd.Series(token_lists, dtype=object).take(codes[valid])
+    tokens.index = series.index[valid]
+    tokens.name = series.name
+    apply_replacements(tokens.explode(), mapping, notes)
+
+    # Codes of -1 (missing values) pick the trailing NaN
+    return pd.Series(translated[codes], index=series.index, name=series.name)
+
+# Tab Creation Functions
+FUNDS_MAPPING = {
+    "NAME": "Fund",
+    "FUND CURRENCY": "Fund Currency",
+    "VINTAGE / INCEPTION YEAR": "Vintage Year",
+    "STATUS": "Fund Status",
+    "STRATEGY": "Fund Style",
+    "ASSET CLASS": "Asset Class",
+    "FUND STRUCTURE": "Separate Account",
+    "FUND NUMBER (OVERALL)": "Fund Sequence (Total)",
+    "FUND NUMBER (SERIES)": "Fund Series",
+    "LIFESPAN (YEARS)": "Fund Life",
+    "LIFESPAN EXTENSION": "Fund Life Extension",
+    "TARGET SIZE (CURR. MN)": "Target Size (Local Currency m)",
+    "INITIAL TARGET (CURR. MN)": "Initial Target Size (Local Currency m)",
+    "HARD CAP (CURR. MN)": "Hard Cap (Local Currency m)",
+    "OFFER CO-INVESTMENT OPPORTUNITIES TO LPS?": "Fund coinvesting Lps",
+    "FUND LEGAL STRUCTURE": "Fund Legal Structure",
+    "TIMES TO FIRST CLOSE": "Times to First Close",
+    "TOTAL MONTHS IN MARKET": "Total Months in Market",
+    "OVERIDE FUND STATUS": "Overide Fund Status"
+}
+
+def create_funds_tab(sheets, source_df, report):
+    # Copy relevant columns to a new DataFrame
+    # (rows repeating the source headers were already dropped at ingestion)
+    funds_df = copy_columns(source_df, FUNDS_MAPPING)
+    
+    funds_df['Open/Closed'] = funds_df.apply(lambda row: (
+        'Open ended' if row['Fund Status'] in ['Open Ended', 'Open ended (Liquidated)'] else
+        'Quasi-open ended' if row['Fund Status'] == 'Semi-Open Ended' else
+        'Evergreen' if row['Fund Status'] == 'Evergreen' else
+        'Closed ended'
+    ), axis=1)
+
+    # Fund Status, Fund Style, Asset Class and Separate Account replacements
+    replacements_notes = {}
+    funds_df['Fund Status'] = apply_replacements(funds_df['Fund Status'], MAPPINGS['fund_status'], replacements_notes)
+    funds_df['Fund Style'] = apply_replacements(funds_df['Fund Style'], MAPPINGS['fund_style'], replacements_notes)
+    funds_df['Asset Class'] = apply_replacements(funds_df['Asset Class'], MAPPINGS['asset_class'], replacements_notes)
+    funds_df['Separate Account'] = apply_replacements(funds_df['Separate Account'], MAPPINGS['separate_account'], replacements_notes)
+
+    # Fund Life Extension replacements
+    funds_df['Fund Life Extension'] = funds_df['Fund Life Extension'].astype(str).str.replace(r'\+', ';', regex=True)
+    funds_df['Fund Life Extension'] = funds_df['Fund Life Extension'].str.replace('nan', '', regex=False)
+
+    # Override Fund Status
+    override_replacements = funds_df['Fund Status'] == 'Liquidated'
+    override_count = override_replacements.sum()
+    override_rows = funds_df.index[override_replacements].tolist()
+    if override_count:
+        # The column may be a constant column (see copy_columns), which only holds its one value
+        funds_df['Overide Fund Status'] = funds_df['Overide Fund Status'].astype(object).mask(override_replacements, "True")
+
+    # Reorder columns to match the desired order
+    column_order = [
+        "Fund", "Fund Currency", "Vintage Year", "Fund Status", "Fund Style", "Asset Class",
+        "Separate Account", "Fund Sequence (Total)", "Fund Series", "Fund Life", 
+        "Fund Life Extension", "Target Size (Local Currency m)", 
+        "Initial Target Size (Local Currency m)", "Hard Cap (Local Currency m)", 
+        "Fund coinvesting Lps", "Fund Legal Structure", "Times to First Close", "Total Months in Market", "Overide Fund Status"
+    ]
+    
+    funds_df = funds_df[column_order]
+
+    write_frame(sheets, funds_df, 'Funds')
+    report.append("Funds tab created")
+    report.append(f"{len(funds_df.columns)} Columns\n")
+    report.extend(funds_df.columns)
+    report.append("\n///////////////////////////////////////////////////////////////////////////\n")
+
+    report.append("'Funds' tab adjustments\n")
+    for original, (replacement, count, rows, column) in replacements_notes.items():
+        record_replacement(report, 'Funds', column, original, replacement, count, rows)
+    record_replacement(report, 'Funds', 'Overide Fund Status', 'Liquidated', 'True', override_count, override_rows)
+    report.append("\n///////////////////////////////////////////////////////////////////////////\n")
+
+
+
+# Interim close statuses => (Event Type, Title suffix), in the order they are appended to the Events tab
+CLOSE_EVENTS = {
+    "First Close": ("First Close", " reaches first close"),
+    "Second Close": ("Second Close", " reaches second close"),
+    "Third Close": ("Third Close", " reaches third close"),
+    "Fourth Close": ("Fourth Close", " reaches fourth close"),
+    "Fifth Close": ("Fifth Close", " reaches fifth close"),
+    "Sixth Close": ("Sixth Close", " reaches sixth close"),
+    "Seventh Close": ("Seventh Close", " reaches seventh close"),
+}
+
+# Further source columns create_events_tab reads for the final and interim closes
+EVENTS_CLOSE_COLUMNS = ["FINAL CLOSE DATE", "STATUS", "LATEST INTERIM CLOSE DATE", "LATEST INTERIM CLOSE SIZE (CURR. MN)"]
+
+EVENTS_MAPPING = {
+    "NAME": "Fund",
+    "FUND RAISING LAUNCH DATE": "Event Date",
+    "": "Event Type",
+    "": "Title",
+    "FINAL CLOSE SIZE (CURR. MN)": "Close Size"
+}
+
+def create_events_tab(sheets, source_df, report):
+    # Check if 'FINAL CLOSE DATE' and other necessary columns exist in the DataFrame
+    if 'FINAL CLOSE DATE' in source_df.columns and 'FINAL CLOSE SIZE (CURR. MN)' in source_df.columns:
+        column_order = ["Fund", "Event Date", "Event Type", "Title", "Close Size"]
+
+        # Create the initial events DataFrame based on the mapping
+        events_df = copy_columns(source_df, EVENTS_MAPPING)
+        events_df['Event Type'] = "Launch"
+        events_df['Title'] = events_df['Fund'] + " launches"
+
+        # Remove rows with blank Event Date
+        events_df = events_df[events_df['Event Date'].notna() & (events_df['Event Date'] != '')]
+        events_df = events_df[column_order]
+
+        report.append("Events tab created")
+        report.append(f"{len(column_order)} Columns\n")
+        report.extend(column_order)
+        report.append("\nLaunch data entered from row 2\n")
+
+        # Final Close data
+        final_close_df = pd.DataFrame({
+            "Fund": source_df["NAME"],
+            "Event Date": source_df["FINAL CLOSE DATE"],
+            "Event Type": "Final Close",
+            "Title": source_df["NAME"] + " reaches final close",
+            "Close Size": source_df["FINAL CLOSE SIZE (CURR. MN)"]
+        })
+        final_close_df = final_close_df[final_close_df['Event Date'].notna()]
+        report.append(f"Final Close data => from row {len(events_df) + 2}\n")
+
+        # Interim closes, from a single grouping of STATUS
+        event_frames = [events_df, final_close_df]
+        startrow = len(events_df) + len(final_close_df) + 1
+        closes = source_df[source_df["STATUS"].isin(CLOSE_EVENTS.keys())]
+        close_groups = dict(list(closes.groupby("STATUS", sort=False, observed=True)))
+        for status, (event_type, title_suffix) in CLOSE_EVENTS.items():
+            close_funds = close_groups.get(status)
+            if close_funds is None or close_funds.empty:
+                report.append(f"{status} data => data was not found in the source file\n")
+                continue
+            event_frames.append(pd.DataFrame({
+                "Fund": close_funds["NAME"],
+                "Event Date": close_funds["LATEST INTERIM CLOSE DATE"],
+                "Event Type": event_type,
+                "Title": close_funds["NAME"] + title_suffix,
+                "Close Size": close_funds["LATEST INTERIM CLOSE SIZE (CURR. MN)"]
+            }))
+            report.append(f"{status} data => from row {startrow + 2}\n")
+            startrow += len(close_funds)
+
+        # Write the whole Events table once
+        write_frame(sheets, pd.concat(event_frames, ignore_index=True)[column_order], 'Events')
+        report.append("///////////////////////////////////////////////////////////////////////////\n")
+    else:
+        report.append("Required columns for 'FINAL CLOSE DATE' or 'FINAL CLOSE SIZE (CURR. MN)' not found. Skipping final close data.\n")
+
+PERFORMANCES_MAPPING = {
+    "NAME": "Fund",
+    "": "Performance Date",
+    "": "Fund Performance Measurement Type",
+    "": "Fund Performance Measurement Unit",
+    "TARGET IRR - NET MIN": "Performance Value (Min)",
+    "TARGET IRR - NET MAX": "Performance Value (Max)",
+    "": "Performance Source",
+    "": "Confidential"
+}
+
+def create_performances_tab(sheets, source_df, report):
+    additional_values_performances = {
+        "Fund Performance Measurement Unit": "Percentage",
+        "Fund Performance Measurement Type": "Target IRR Net"
+    }
+    performances_df = copy_columns(source_df, PERFORMANCES_MAPPING, additional_values_performances)
+    for col in ['Fund', 'Performance Date', 'Fund Performance Measurement Type', 'Fund Performance Measurement Unit', 'Performance Value (Min)', 'Performance Value (Max)', 'Performance Source', 'Confidential']:
+        if col not in performances_df.columns:
+            performances_df[col] = constant_column("", performances_df.index)
+    performances_df['Performance Date'] = constant_column("", performances_df.index)
+    performances_df['Fund Performance Measurement Type'] = constant_column("Target IRR Net", performances_df.index)
+    performances_df['Fund Performance Measurement Unit'] = constant_column("Percentage", performances_df.index)
+    performances_df['Performance Source'] = constant_column("", performances_df.index)
+    performances_df['Confidential'] = constant_column("", performances_df.index)
+    performances_df = performances_df[['Fund', 'Performance Date', 'Fund Performance Measurement Type', 'Fund Performance Measurement Unit', 'Performance Value (Min)', 'Performance Value (Max)', 'Performance Source', 'Confidential']]
+    
+    # Remove rows where both Performance Value (Min) and Performance Value (Max) are blank    
+    performances_df = performances_df[~((performances_df['Performance Value (Min)'].isna()) & (performances_df['Performance Value (Max)'].isna()) | 
+                                  ((performances_df['Performance Value (Min)'] == '') & (performances_df['Performance Value (Max)'] == '')))]
+
+    write_frame(sheets, performances_df, 'Performances')
+    report.append("Performances tab created")
+    report.append(f"{len(performances_df.columns)} Columns\n")
+    report.extend(performances_df.columns)
+
+    startrow_performance = len(performances_df) + 1
+    startrow_performance = append_performance_data(sheets, source_df, startrow_performance, report)
+    report.append("///////////////////////////////////////////////////////////////////////////\n")
+
+def create_actual_performance_tab(sheets, source_df, report):
+    actual_performance_df = pd.DataFrame(columns=["Fund", "Performance Date", "Called (%)"])
+    write_frame(sheets, actual_performance_df, 'Actual Performance')
+    report.append("Actual Performance tab created")
+    report.append("3 Columns\n")
+    report.extend(["Fund", "Performance Date", "Called (%)"])
+    report.append("///////////////////////////////////////////////////////////////////////////\n")
+
+DOMICILE_MAPPING = {
+    "NAME": "Fund",
+    "DOMICILE": "Domicile"
+}
+
+def create_domicile_tab(sheets, source_df, report):
+    domicile_df = copy_columns(source_df, DOMICILE_MAPPING)
+    
+    
+    domicile_notes = {}
+    domicile_df['Domicile'] = apply_replacements(domicile_df['Domicile'], MAPPINGS['domicile'], domicile_notes)
+    
+    write_frame(sheets, domicile_df, 'Domicile')
+    report.append("Domicile tab created")
+    report.append(f"{len(domicile_df.columns)} Columns\n")
+    report.extend(domicile_df.columns)
+    
+    report.append("'Domicile' tab adjustments\n")
+    for original, (replacement, count, rows, column) in domicile_notes.items():
+        record_replacement(report, 'Domicile', column, original, replacement, count, rows)
+    report.append("///////////////////////////////////////////////////////////////////////////\n")
+
+PRIMARY_REGION_MAPPING = {
+    "NAME": "Fund",
+    "PRIMARY REGION FOCUS": "Target Geographies Primary Region"
+}
+
+def create_target_geographies_primary_region_tab(sheets, source_df, report):
+    target_geographies_primary_region_df = copy_columns(source_df, PRIMARY_REGION_MAPPING)
+    
+    
+    primary_region_notes = {}
+    target_geographies_primary_region_df['Target Geographies Primary Region'] = apply_replacements(target_geographies_primary_region_df['Target Geographies Primary Region'], MAPPINGS['primary_region'], primary_region_notes)
+    
+    write_frame(sheets, target_geographies_primary_region_df, 'Target_Geographies_Primary_Regi')
+    report.append("Target_Geographies_Primary_Regi tab created")
+    report.append(f"{len(target_geographies_primary_region_df.columns)} Columns\n")
+    report.extend(target_geographies_primary_region_df.columns)
+    
+    report.append("'Target_Geographies_Primary_Regi' tab adjustments\n")
+    for original, (replacement, count, rows, column) in primary_region_notes.items():
+        record_replacement(report, 'Target_Geographies_Primary_Regi', column, original, replacement, count, rows)
+    report.append("///////////////////////////////////////////////////////////////////////////\n")
+
+GEOGRAPHIES_MAPPING = {
+    "NAME": "Fund",
+    "GEOGRAPHIC EXPOSURE": "Fund Target Geography"
+}
+
+def create_target_geographies_tab(sheets, source_df, report):
+    target_geographies_df = copy_columns(source_df, GEOGRAPHIES_MAPPING)
+
+
+    geographies_notes = {}
+    target_geographies_df['Fund Target Geography'] = replace_geography_tokens(target_geographies_df['Fund Target Geography'], MAPPINGS['geographies'], geographies_notes)
+    
+    write_frame(sheets, target_geographies_df, 'Target_Geographies')
+    report.append("Target_Geographies tab created")
+    report.append(f"{len(target_geographies_df.columns)} Columns\n")
+    report.extend(target_geographies_df.columns)
+    
+    report.append("'Target_Geographies' tab adjustments\n")
+    for original, (replacement, count, rows, column) in geographies_notes.items():
+        record_replacement(report, 'Target_Geographies', column, original, replacement, count, rows)
+    report.append("///////////////////////////////////////////////////////////////////////////\n")
+
+SECTORS_PRIMARY_MAPPING = {
+    "NAME": "Fund",
+    "INF: PRIMARY SECTOR": "Sector - Primary"
+}
+
+def create_target_sectors_primary_tab(sheets, source_df, report):
+    target_sectors_primary_df = copy_columns(source_df, SECTORS_PRIMARY_MAPPING)
+    
+    
+    sectors_primary_notes = {}
+    target_sectors_primary_df['Sector - Primary'] = apply_replacements(target_sectors_primary_df['Sector - Primary'], MAPPINGS['primary_sector'], sectors_primary_notes)
+    
+    write_frame(sheets, target_sectors_primary_df, 'Target_Sectors_Primary')
+    report.append("Target_Sectors_Primary tab created")
+    report.append(f"{len(target_sectors_primary_df.columns)} Columns\n")
+    report.extend(target_sectors_primary_df.columns)
+    
+    report.append("'Target_Sectors_Primary' tab adjustments\n")
+    for original, (replacement, count, rows, column) in sectors_primary_notes.items():
+        record_replacement(report, 'Target_Sectors_Primary', column, original, replacement, count, rows)
+    report.append("///////////////////////////////////////////////////////////////////////////\n")
+
+def create_target_sectors_secondary_tab(sheets, source_df, report):
+    target_sectors_secondary_df = pd.DataFrame(columns=["Fund", "Fund Subsectors"])
+    write_frame(sheets, target_sectors_secondary_df, 'Target_Sectors_Secondary')
+    report.append("Target_Sectors_Secondary tab created")
+    report.append("2 Columns\n")
+    report.extend(["Fund", "Fund Subsectors"])
+    report.append("///////////////////////////////////////////////////////////////////////////\n")
+
+# Define the roles and corresponding source columns
+ROLES_MAPPING = [
+    ("FUND MANAGER", "General Partner"),
+    ("PLACEMENT AGENTS", "Placement Agent"),
+    ("LAW FIRMS", "Legal Adviser"),
+    ("AUDITORS", "Auditor"),
+    ("ADMINISTRATORS", "Administrator")
+]
+
+def create_roles_tab(sheets, source_df, report):
+    # Look the columns up by normalized name without renaming the shared source_df
+    normalized_columns = dict(zip(source_df.columns.str.strip().str.upper(), source_df.columns))
+    
+    # One column per role (blank if the source column is missing), melted into one row per fund and role
+    role_columns = {"Fund": source_df[normalized_columns["NAME"]]}
+    for role_column, role_name in ROLES_MAPPING:
+        if role_column in normalized_columns:
+            role_columns[role_name] = source_df[normalized_columns[role_column]]
+        else:
+            role_columns[role_name] = ""
+    roles_df = pd.DataFrame(role_columns).melt(id_vars="Fund", var_name="Role", value_name="Company")
+    roles_df['Role'] = roles_df['Role'].astype('category')
+    
+    company = roles_df['Company']
+    text = company.astype(str).str.strip()
+    
+    # Step 6 and 7: Handle 'Confidential' column based on 'Company' column values
+    roles_df['Confidential'] = flag_column(text.str.lower().isin(["not used", "used but not specified"]), roles_df.index)
+    
+    # Step 8: Remove rows where 'Company' is blank, empty, or contains only whitespace or commas
+    # (missing companies are kept, as they always have been)
+    keep = company.isna() | ((text != "") & ~text.str.contains(',', regex=False, na=False))
+    roles_df = roles_df[keep]
+    
+    # Step 9 and 10: Replace specific terms with a blank cell in the 'Company' column
+    company = roles_df['Company']
+    roles_df['Company'] = company.mask(company.isin(["Not Used", "Used but Not Specified"]), "")
+    
+    # Add 'Not Used' column (optional, depending on your needs)
+    roles_df['Not Used'] = flag_column(roles_df['Company'] == "", roles_df.index)
+    
+    # Reorder columns to match the specified order
+    roles_df = roles_df[['Fund', 'Company', 'Role', 'Not Used', 'Confidential']]
+    
+    # Write the dataframe to the 'Roles' sheet
+    write_frame(sheets, roles_df, 'Roles')
+    
+    # Update the report
+    report.append("Roles tab created")
+    report.append(f"{len(roles_df.columns)} Columns\n")
+    report.extend(['Fund', 'Company', 'Role', 'Not Used', 'Confidential'])
+    report.append("///////////////////////////////////////////////////////////////////////////\n")
+
+
+def create_fees_tab(sheets, source_df, report):
+    fees_df = pd.DataFrame(columns=["Fund", "Attribute", "Value"])
+    write_frame(sheets, fees_df, 'Fees')
+
+# Tab builders, in the order their sheets and report sections appear in the output
+TAB_BUILDERS = [
+    create_funds_tab,
+    create_events_tab,
+    create_performances_tab,
+    create_actual_performance_tab,
+    create_domicile_tab,
+    create_target_geographies_primary_region_tab,
+    create_target_geographies_tab,
+    create_target_sectors_primary_tab,
+    create_target_sectors_secondary_tab,
+    create_roles_tab,
+    create_fees_tab,
+]
+
+# Every source column a tab builder reads, normalized the way create_roles_tab matches them.
+# Ingestion parses only these; missing ones still get copy_columns' blank fallback.
+SOURCE_COLUMNS = frozenset(
+    [column for mapping in (FUNDS_MAPPING, EVENTS_MAPPING, PERFORMANCES_MAPPING, PERFORMANCE_DATA_MAPPING,
+                            DOMICILE_MAPPING, PRIMARY_REGION_MAPPING, GEOGRAPHIES_MAPPING, SECTORS_PRIMARY_MAPPING)
+     for column in mapping if column]
+    + EVENTS_CLOSE_COLUMNS
+    + [role_column for role_column, _ in ROLES_MAPPING]
+)
+
+def normalize_column(column):
+    return str(column).strip().upper()
+
+def run_tab_builder(builder, source_df, report, timer):
+    tabs = {}
+    with timer.profiled(), timer.stage(builder.__name__) as stage:
+        builder(tabs, source_df, report)
+        stage["rows"] = sum(len(df) for pieces in tabs.values() for _, _, df in pieces)
+    return tabs
+
+def build_tabs(source_df, report, max_workers=None, timer=None):
+    """
+    Run the tab builders concurrently on a thread pool of ``max_workers`` threads. The builders
+    only read ``source_df`` (each gets its own shallow copy) and write to their own child report
+    sink; tabs and report events are merged back in TAB_BUILDERS order, so the output does not
+    depend on scheduling. Each builder is a stage of ``timer``.
+    """
+    timer = timer or StageTimer()
+    builder_reports = [report.child() for _ in TAB_BUILDERS]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(run_tab_builder, TAB_BUILDERS, [source_df.copy(deep=False) for _ in TAB_BUILDERS],
+                                    builder_reports, [timer] * len(TAB_BUILDERS)))
+
+    tabs = {}
+    for builder_tabs, builder_report in zip(results, builder_reports):
+        tabs.update(builder_tabs)
+        report.merge(builder_report)
+    return tabs
+
+# Source ingestion
+def convert_source_value(value, data_type):
+    # Same conversions as pandas' openpyxl reader, so the frames match pd.read_excel
+    if value is None:
+        return ""
+    if data_type == TYPE_ERROR:
+        return np.nan
+    if data_type == TYPE_NUMERIC:
+        integral = int(value)
+        return integral if integral == value else float(value)
+    return value
+
+def convert_source_cell(cell):
+    return convert_source_value(cell.value, cell.data_type)
+
+# ProjectedSheetParser extends openpyxl's private worksheet reader; without it (the module moved
+# in some openpyxl release) iter_source_rows projects iter_rows instead
+try:
+    from openpyxl.worksheet._reader import WorkSheetParser
+except ImportError:
+    ProjectedSheetParser = None
+else:
+    class ProjectedSheetParser(WorkSheetParser):
+        """
+        Worksheet XML parser that only parses the cells of ``columns`` (1-based indexes); the other
+        cells of each row are skipped before their values are read, typed or looked up.
+        """
+
+        def __init__(self, src, worksheet, columns):
+            workbook = worksheet.parent
+            super().__init__(src, worksheet._shared_strings, data_only=workbook.data_only, epoch=workbook.epoch,
+                             date_formats=workbook._date_formats, timedelta_formats=workbook._timedelta_formats)
+            self.columns = columns
+            self._column_indexes = {}
+
+        def parse_row(self, row):
+            number = row.get('r')
+            self.row_counter = int(float(number)) if number else self.row_counter + 1
+            self.col_counter = 0
+            cells = []
+            for element in row:
+                coordinate = element.get('r')
+                if not coordinate:
+                    # No reference: parse_cell counts the column
+                    cell = self.parse_cell(element)
+                    if cell['column'] in self.columns:
+                        cells.append(cell)
+                    continue
+                letters = coordinate.rstrip('0123456789')
+                column = self._column_indexes.get(letters)
+                if column is None:
+                    column = self._column_indexes[letters] = column_index_from_string(letters)
+                if column in self.columns:
+                    cells.append(self.parse_cell(element))
+                else:
+                    self.col_counter = column
+            return self.row_counter, cells
+
+def iter_projected_values(worksheet, positions, min_row):
+    """
+    Converted values of the cells at ``positions`` (0-based) of every row from Excel row
+    ``min_row``, one list per row with missing rows as blank lists. ProjectedSheetParser builds
+    on openpyxl's private reader, so this returns None when the installed openpyxl does not
+    fit it (checked on the first row) and the caller falls back to iter_rows.
+    """
+    if ProjectedSheetParser is None:
+        return None
+    slots = {position + 1: slot for slot, position in enumerate(positions)}
+    try:
+        src = worksheet._get_source()
+    except AttributeError:
+        return None
+    try:
+        rows = ProjectedSheetParser(src, worksheet, slots).parse()
+        first = next(rows, None)
+        if first is not None:
+            projected_row_values(first[1], slots)
+    except (AttributeError, TypeError, KeyError):
+        src.close()
+        return None
+    rows = chain([first] if first is not None else [], rows)
+    return stream_projected_values(src, rows, slots, min_row)
+
+def projected_row_values(cells, slots):
+    values = [""] * len(slots)
+    for cell in cells:
+        values[slots[cell['column']]] = convert_source_value(cell['value'], cell['data_type'])
+    return values
+
+def stream_projected_values(src, rows, slots, min_row):
+    expected = min_row
+    with src:
+        for number, cells in rows:
+            if number < min_row:
+                continue
+            for _ in range(expected, number):
+                yield []
+            expected = number + 1
+            yield projected_row_values(cells, slots)
+
+def iter_source_rows(worksheet, positions=None, min_row=1):
+    """
+    Stream the rows of a read-only worksheet from Excel row ``min_row`` as lists of converted
+    values, padded to the sheet width; with ``positions``, only the cells at those column
+    positions. Blank rows are held back until a later row has data, so trailing blank rows
+    are dropped without buffering the sheet.
+    """
+    raw_rows = iter_projected_values(worksheet, positions, min_row) if positions is not None else None
+    if raw_rows is not None:
+        width = len(positions)
+    else:
+        raw_rows = ([convert_source_cell(cell) for cell in row] for row in worksheet.iter_rows(min_row=min_row))
+        if positions is not None:
+            raw_rows = ([row[position] if position < len(row) else "" for position in positions] for row in raw_rows)
+        width = len(positions) if positions is not None else worksheet.max_column or 0
+    pending_blank = 0
+    for values in raw_rows:
+        while values and values[-1] == "":
+            values.pop()
+        if not values:
+            pending_blank += 1
+            continue
+        width = max(width, len(values))
+        for _ in range(pending_blank):
+            yield [""] * width
+        pending_blank = 0
+        yield values + [""] * (width - len(values))
+
+def parse_source_rows(rows, columns=None):
+    # Raw object columns; NA strings and header de-duplication as in pd.read_excel
+    if columns is None:
+        return TextParser(rows, header=0, dtype=object).read()
+    return TextParser(rows, header=None, names=columns, dtype=object).read()
+
+def infer_source_types(df):
+    """
+    Infer column dtypes the way pd.read_excel does: numeric where the whole column converts,
+    otherwise datetime/object inference.
+    """
+    for col in df.columns:
+        try:
+            df[col] = pd.to_numeric(df[col])
+        except (ValueError, TypeError):
+            df[col] = df[col].infer_objects()
+    return df
+
+# Vendor layout: the header row holds a 'NAME' cell, and some exports put a preamble between
+# the header and the funds that ends with the 'FUND MANAGER TOTAL AUM (EUR MN)' row
+HEADER_LABEL = 'NAME'
+PREAMBLE_MARKER = 'FUND MANAGER TOTAL AUM (EUR MN)'
+LAYOUT_SCAN_ROWS = 200
+
+def scan_source_layout(head_rows):
+    """
+    Locate the header and the preamble in the first rows of a sheet. The header is the first row
+    with a 'NAME' cell (the first row when there is none); the preamble runs from the row after
+    the header through the row whose 'NAME' cell is PREAMBLE_MARKER. Returns
+    (header position, number of rows after the header to skip).
+    """
+    header_at = next((position for position, row in enumerate(head_rows) if HEADER_LABEL in row), 0)
+    if not head_rows:
+        return header_at, 0
+    # The marker sits in the fund name column
+    name_at = head_rows[header_at].index(HEADER_LABEL) if HEADER_LABEL in head_rows[header_at] else 0
+    for position in range(header_at + 1, len(head_rows)):
+        if len(head_rows[position]) > name_at and head_rows[position][name_at] == PREAMBLE_MARKER:
+            return header_at, position - header_at
+    return header_at, 0
+
+def repeated_header_rows(chunk):
+    # Rows where some cell repeats its own column header, as vendor page breaks do
+    repeated = np.zeros(len(chunk), dtype=bool)
+    for col in chunk.columns:
+        repeated |= (chunk[col] == col).to_numpy()
+    return repeated
+
+def iter_source_raw_chunks(worksheet, chunksize, skipped=None, usecols=None):
+    """
+    Yield raw object chunks of the source sheet, indexed by Excel row - 2 (the row labels
+    clean_specific_values reports). When ``skipped`` is a dict, the vendor layout is detected
+    from the first LAYOUT_SCAN_ROWS rows: rows above the header, the preamble and repeated header
+    rows are left out, and their Excel rows are recorded in ``skipped`` by reason. With
+    ``usecols`` (normalized names, see SOURCE_COLUMNS) only those columns are parsed.
+    """
+    # Like pd.read_excel, ignore the sheet's stored <dimension>: a stale one would cut rows off
+    if hasattr(worksheet, 'reset_dimensions'):
+        worksheet.reset_dimensions()
+    rows = iter_source_rows(worksheet)
+    header_at, preamble_rows = 0, 0
+    if skipped is not None:
+        head_rows = list(islice(rows, LAYOUT_SCAN_ROWS))
+        header_at, preamble_rows = scan_source_layout(head_rows)
+        rows = chain(head_rows, rows)
+        if header_at:
+            skipped["Rows above the header"] = list(range(1, header_at + 1))
+        if preamble_rows:
+            skipped["Vendor preamble"] = list(range(header_at + 2, header_at + 2 + preamble_rows))
+
+    # Skip straight to the header, then past the preamble
+    header = next(islice(rows, header_at, None), None)
+    if header is None:
+        return
+    columns = parse_source_rows([header]).columns
+    rows = islice(rows, preamble_rows, None)
+    if usecols is not None:
+        # Re-stream the data rows through a parser that skips the other columns' cells
+        positions = [position for position, col in enumerate(columns) if normalize_column(col) in usecols]
+        columns = columns[positions]
+        rows = iter_source_rows(worksheet, positions, min_row=header_at + preamble_rows + 2)
+    # Excel row of the first data row, minus 2
+    start = header_at + preamble_rows
+    yielded = False
+    while True:
+        chunk_rows = [row for _, row in zip(range(chunksize), rows)]
+        if not chunk_rows:
+            break
+        widest = max(map(len, chunk_rows))
+        if widest > len(columns):
+            # Cells past the header's last cell: pd.read_excel names their columns as blank headers
+            columns = parse_source_rows([header + [""] * (widest - len(header))]).columns
+        chunk = parse_source_rows(chunk_rows, columns)
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        start += len(chunk)
+        if skipped is not None:
+            repeated = repeated_header_rows(chunk)
+            if repeated.any():
+                skipped.setdefault("Repeated header", []).extend((chunk.index[repeated] + 2).tolist())
+                chunk = chunk[~repeated]
+        yielded = True
+        yield chunk
+    if not yielded:
+        yield pd.DataFrame(columns=columns, dtype=object)
+
+def iter_source_chunks(worksheet, chunksize=50000):
+    """
+    Yield the source sheet as DataFrames of at most ``chunksize`` rows, indexed by their
+    position in the sheet. Dtypes are inferred per chunk.
+    """
+    for chunk in iter_source_raw_chunks(worksheet, chunksize):
+        yield infer_source_types(chunk)
+
+def read_source_sheet(worksheet, chunksize=50000, skipped=None, usecols=None):
+    """
+    Read a read-only worksheet into a DataFrame equivalent to pd.read_excel, holding at most
+    ``chunksize`` rows of Python values at a time. Dtypes are inferred once over the whole column.
+    Pass a ``skipped`` dict to leave out the vendor preamble and repeated headers (see
+    iter_source_raw_chunks), and ``usecols`` to parse only some columns.
+    """
+    chunks = list(iter_source_raw_chunks(worksheet, chunksize, skipped, usecols))
+    if not chunks:
+        return pd.DataFrame()
+    return infer_source_types(pd.concat(chunks))
+
+# Low-cardinality source columns that can be held as categoricals
+CATEGORICAL_COLUMNS = [
+    "STATUS", "STRATEGY", "ASSET CLASS", "FUND STRUCTURE",
+    "DOMICILE", "PRIMARY REGION FOCUS", "INF: PRIMARY SECTOR",
+]
+
+def categorize_columns(df, columns=CATEGORICAL_COLUMNS):
+    """
+    Convert the given text columns to ``category`` dtype. Tabs copy the codes instead of the
+    strings, and apply_replacements then maps each column per category instead of per row.
+    """
+    for col in columns:
+        if col in df.columns and (df[col].dtype == object or isinstance(df[col].dtype, pd.StringDtype)):
+            df[col] = df[col].astype('category')
+    return df
+
+# Main Processing Function
+# Utility Function to clean specific values
+SENTINEL_VALUES = ["0", "nan", "n/a"]
+
+def clean_specific_values(df, tab_name, report, detail=False):
+    """
+    Blank out "0", "nan" and "n/a" cells with one vectorized mask per column.
+
+    By default the report gets one event per column and value with the affected row ranges;
+    ``detail=True`` keeps the original one-event-per-cell output.
+    """
+    for col in df.columns:
+        column = df[col]
+        # Only text columns can hold the sentinel strings
+        if not (column.dtype == object or isinstance(column.dtype, pd.StringDtype)):
+            continue
+        mask = column.isin(SENTINEL_VALUES)
+        if not mask.any():
+            continue
+
+        hits = column[mask]
+        if detail:
+            for idx, value in hits.items():
+                report.deleted_cell(tab_name, col, value, idx + 2)
+        else:
+            for value in SENTINEL_VALUES:
+                rows = hits.index[hits == value] + 2
+                if len(rows):
+                    report.deletion(tab_name, col, value, rows)
+
+        df[col] = column.mask(mask, "")
+    return df
+
+# In your process function, apply the clean_specific_values function to each dataframe
+DEFAULT_SHEETS = ["Sheet1", "Sheet2", "Sheet3"]  # Replace with your actual sheet names
+
+def read_clean_sheet(source_book, sheet, report, detailed_report, timer):
+    with timer.profiled():
+        with timer.stage(f"read_source_sheet ({sheet})") as stage:
+            skipped = {}
+            source_df = read_source_sheet(source_book[sheet], skipped=skipped, usecols=SOURCE_COLUMNS)
+            stage["rows"] = len(source_df)
+        for reason, rows in skipped.items():
+            report.skipped_rows(sheet, reason, rows)
+
+        # Clean specific values in the dataframe
+        with timer.stage(f"clean_specific_values ({sheet})", rows=len(source_df)):
+            return clean_specific_values(source_df, sheet, report, detail=detailed_report)
+
+def read_source_sheets(uploaded_file, report, detailed_report=False, timer=None, max_workers=None):
+    """
+    Read and clean every default sheet found in the upload, concurrently on a thread pool. Each
+    sheet streams from its own member of the shared read-only workbook and reports to a child
+    sink; returns [(sheet name, source_df)] in DEFAULT_SHEETS order.
+    """
+    timer = timer or StageTimer()
+    with timer.stage("load_workbook"):
+        source_book = load_workbook(uploaded_file, read_only=True, data_only=True, keep_links=False)
+    try:
+        sheets = [sheet for sheet in DEFAULT_SHEETS if sheet in source_book.sheetnames]
+        sheet_reports = [report.child() for _ in sheets]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            frames = list(executor.map(
+                lambda sheet, sheet_report: read_clean_sheet(source_book, sheet, sheet_report, detailed_report, timer),
+                sheets, sheet_reports,
+            ))
+    finally:
+        source_book.close()
+
+    for sheet_report in sheet_reports:
+        report.merge(sheet_report)
+    return list(zip(sheets, frames))
+
+def read_source(uploaded_file, report, detailed_report=False, categorical=False, timer=None, max_workers=None):
+    """
+    All default sheets of the upload as one source_df, each sheet's rows after the previous
+    sheet's. A single sheet keeps its row labels (Excel row - 2); several are numbered by
+    position in the merged frame, and the report maps those back to each sheet's labels.
+    Returns None when no default sheet is present.
+    """
+    timer = timer or StageTimer()
+    source_sheets = read_source_sheets(uploaded_file, report, detailed_report, timer, max_workers)
+    if not source_sheets:
+        return None
+
+    first_row = 0
+    for sheet, source_df in source_sheets:
+        report.source_sheet(sheet, first_row, source_df.index)
+        first_row += len(source_df)
+    if len(source_sheets) == 1:
+        source_df = source_sheets[0][1]
+    else:
+        with timer.stage("merge_source_sheets", rows=first_row):
+            source_df = pd.concat([df for _, df in source_sheets], ignore_index=True)
+
+    if categorical:
+        with timer.stage("categorize_columns", rows=len(source_df)):
+            source_df = categorize_columns(source_df)
+    return source_df
+
+def process_file(uploaded_file, detailed_report=False, write_only=False, max_workers=None, categorical=False,
+                 bundle_format=None, include_workbook=True, trace_memory=False, profile=False, progress=None,
+                 in_memory=False):
+    """
+    Curate an uploaded source workbook. Every stage is timed into the report; ``trace_memory``
+    adds tracemalloc deltas and ``profile`` writes a cProfile dump next to the report
+    (see profile_path). ``progress`` is called as each stage starts and ends (see StageTimer).
+    Outputs are temp files owned by the caller, or spooled files with ``in_memory`` (see write_outputs).
+    """
+    report = ReportSink()
+    timer = StageTimer(trace_memory=trace_memory, profile=profile, progress=progress)
+
+    try:
+        with timer.profiled():
+            # Every default sheet feeds one set of tabs
+            source_df = read_source(uploaded_file, report, detailed_report, categorical, timer, max_workers)
+            output_sheets = {} if source_df is None else build_tabs(source_df, report, max_workers=max_workers, timer=timer)
+
+            outputs = write_outputs(output_sheets, report, write_only, bundle_format, include_workbook, timer, in_memory)
+    finally:
+        timer.close()
+        report.close()
+    return dump_run_profile(timer, outputs, in_memory)
+
+def profile_path(report_file_path):
+    # The opt-in cProfile dump sits next to the .txt report, like the .jsonl events
+    return os.path.splitext(report_file_path)[0] + '.prof'
+
+def dump_run_profile(timer, outputs, in_memory=False):
+    # A profiled run's dump goes next to its .txt report, or into the SpooledOutputs of an in-memory run
+    if not in_memory:
+        timer.dump_profile(profile_path(outputs[2]))
+        return outputs
+    profile_file = spooled_file()
+    if timer.dump_profile(profile_file) is None:
+        profile_file.close()
+        return outputs
+    return outputs._replace(profile=profile_file)
+
+# Outputs of an in-memory run: spooled files (see output_spool), None for those not produced
+SpooledOutputs = namedtuple("SpooledOutputs", ["workbook", "dest_file_name", "report", "bundle", "report_events", "profile"])
+
+def temp_output_path(suffix):
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        return tmp.name
+
+def remove_outputs(outputs):
+    """
+    Delete the temp files of a run (process_file's tuple), with its .jsonl events and .prof dump.
+    """
+    dest_file_path, _, report_file_path, bundle_file_path = outputs
+    paths = [dest_file_path, bundle_file_path]
+    if report_file_path:
+        paths += [report_file_path, report_events_path(report_file_path), profile_path(report_file_path)]
+    for path in paths:
+        if path and os.path.exists(path):
+            os.remove(path)
+
+def write_outputs(output_sheets, report, write_only=False, bundle_format=None, include_workbook=True, timer=None,
+                  in_memory=False):
+    """
+    Save the collected tabs (workbook and/or bundle) and render the report sink, closing with the
+    stage timings of ``timer``. By default the outputs are temp files the caller moves or removes
+    (see remove_outputs), with the .jsonl events next to the .txt report (see report_events_path);
+    returns (dest_file_path, dest_file_name, report_file_path, bundle_file_path). With
+    ``in_memory`` they are spooled files and a SpooledOutputs is returned. Either way nothing is
+    left behind when writing fails.
+    """
+    timer = timer or StageTimer()
+
+    with timer.stage("sheet_column_widths"):
+        column_widths = {sheet_name: sheet_column_widths(pieces) for sheet_name, pieces in output_sheets.items()}
+    output_rows = sum(len(df) for pieces in output_sheets.values() for _, _, df in pieces)
+
+    # Generate file name with current date and time
+    now = datetime.now().strftime("%Y%m%d_%H%M")
+    dest_file_name = f"curated_finfra1_{now}.xlsx"
+
+    dest_file = bundle_file = report_file_path = None
+    try:
+        if include_workbook:
+            dest_file = spooled_file() if in_memory else temp_output_path('.xlsx')
+
+            # write_only streams rows to disk instead of building every cell in memory
+            if write_only:
+                with timer.stage("save_workbook_streaming", rows=output_rows):
+                    save_workbook_streaming(output_sheets, dest_file, column_widths)
+            else:
+                with timer.stage("save_workbook", rows=output_rows):
+                    save_workbook(output_sheets, dest_file, column_widths)
+
+        if bundle_format:
+            bundle_file = spooled_file() if in_memory else temp_output_path('.zip')
+            with timer.stage(f"export_bundle ({bundle_format})", rows=output_rows):
+                export_bundle(output_sheets, bundle_file, bundle_format)
+
+        # Render the report file from the streamed events
+        timer.emit(report)
+        if in_memory:
+            report_file, report_events = spooled_file("w+"), spooled_file("w+")
+            report.render(report_file)
+            report.save_events(report_events)
+            return SpooledOutputs(dest_file, dest_file_name, report_file, bundle_file, report_events, None)
+        report_file_path = temp_output_path('.txt')
+        report.save_events(report_events_path(report_file_path))
+        report.render(report_file_path)
+        return dest_file, dest_file_name, report_file_path, bundle_file
+    except BaseException:
+        if not in_memory:
+            remove_outputs((dest_file, dest_file_name, report_file_path, bundle_file))
+        raise
+    finally:
+        report.close()
@@ -0,0 +1,215 @@
+import argparse
+import os
+import re
+import shutil
+import sys
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from curate import (
+    CLOSE_EVENTS, ROLES_MAPPING, assemble_sheet, build_tabs, iter_source_raw_chunks, read_source, write_outputs,
+)
+from instrumentation import StageTimer
+from report_sink import ReportSink, report_events_path
+
+
+# Tabs written in sections, one after the other: the column naming a row's section and the
+# sections in the order the tab builders write them. Rows of the other tabs follow the source.
+TAB_SECTIONS = {
+    "Events": ("Event Type", ["Launch", "Final Close"] + [event_type for event_type, _ in CLOSE_EVENTS.values()]),
+    "Performances": ("Fund Performance Measurement Type", ["Target IRR Net", "Target IRR (Gross) (%)"]),
+    "Roles": ("Role", [role_name for _, role_name in ROLES_MAPPING]),
+}
+
+# Report lines giving the first row of a section, e.g. "Final Close data => from row 266"
+SECTION_ROW_LINE = re.compile(r"^(?P<section>.+) data => (from row \d+|data was not found in the source file)\n$")
+
+
+def row_hashes(source_df, columns):
+    """
+    One hash per source row over ``columns``. Numeric columns are hashed as floats, so an int
+    column picking up a blank does not change its other rows' hashes.
+    """
+    frame = source_df[columns].copy()
+    for col in columns:
+        if pd.api.types.is_numeric_dtype(frame[col]) and not pd.api.types.is_bool_dtype(frame[col]):
+            frame[col] = frame[col].astype(float)
+    return pd.util.hash_pandas_object(frame, index=False)
+
+
+def fingerprint_funds(source_df, columns):
+    """
+    One fingerprint per NAME: the hashes of the fund's source rows over ``columns``.
+    """
+    return row_hashes(source_df, columns).groupby(source_df["NAME"], sort=False).agg(tuple)
+
+
+def diff_funds(previous_df, current_df):
+    """
+    Compare two cleaned source frames by NAME. Returns (added, changed, removed) fund names,
+    in source order. Columns present in only one snapshot are ignored.
+    """
+    columns = sorted(set(previous_df.columns) & set(current_df.columns), key=str)
+    previous = fingerprint_funds(previous_df, columns)
+    current = fingerprint_funds(current_df, columns)
+
+    added = [name for name in current.index if name not in previous.index]
+    removed = [name for name in previous.index if name not in current.index]
+    common = current.index.intersection(previous.index, sort=False)
+    changed = [name for name in common if current[name] != previous[name]]
+    return added, changed, removed
+
+
+def read_curated_sheet(worksheet, chunksize=50000):
+    # The cells as written, without read_source_sheet's type inference: text that looks numeric
+    # stays text, as the tab builders wrote it
+    chunks = list(iter_source_raw_chunks(worksheet, chunksize))
+    return pd.concat(chunks) if chunks else pd.DataFrame()
+
+
+def read_curated_output(path):
+    # Previous curated workbook as {sheet name: frame}
+    workbook = load_workbook(path, read_only=True, data_only=True, keep_links=False)
+    try:
+        return {sheet_name: read_curated_sheet(workbook[sheet_name]) for sheet_name in workbook.sheetnames}
+    finally:
+        workbook.close()
+
+
+def source_frame(source_file, report, detailed_report, categorical, timer, max_workers):
+    source_df = read_source(source_file, report, detailed_report, categorical, timer, max_workers)
+    if source_df is None:
+        raise ValueError(f"No source sheet found in {source_file}")
+    return source_df
+
+
+def report_funds(report, change, names):
+    report.append(f"{change.capitalize()} funds: {len(names)}")
+    for name in names:
+        report.emit("delta", change=change, fund=name)
+
+
+def order_rows(sheet_name, tab, fund_positions):
+    """
+    Order a merged tab as a full run would write it: section by section (see TAB_SECTIONS), each
+    in the funds' order in the new source. Rows of one fund keep their order; rows whose fund or
+    section is unknown go last.
+    """
+    if not len(tab.columns):
+        return tab
+    keys = {"position": tab.iloc[:, 0].map(fund_positions)}
+    if sheet_name in TAB_SECTIONS:
+        column, sections = TAB_SECTIONS[sheet_name]
+        keys = {"section": tab[column].map({section: rank for rank, section in enumerate(sections)}), **keys}
+    order = pd.DataFrame(keys).sort_values(list(keys), kind="stable", na_position="last").index
+    return tab.loc[order].reset_index(drop=True)
+
+
+def section_first_rows(output_sheets):
+    # Worksheet row of the first row of every section, keyed by the section's report label
+    first_rows = {}
+    for sheet_name, (column, _) in TAB_SECTIONS.items():
+        if sheet_name not in output_sheets:
+            continue
+        tab = output_sheets[sheet_name][0][2]
+        if column not in tab.columns:
+            continue
+        for position, section in tab[column].reset_index(drop=True).drop_duplicates().items():
+            first_rows[section] = position + 2
+    return first_rows
+
+
+def merge_tab_report(report, tab_report, first_rows):
+    """
+    Append the tab builders' events to ``report``, with the section row lines rewritten for the
+    merged tabs: the builders only saw the rebuilt funds.
+    """
+    for event in tab_report.events():
+        match = SECTION_ROW_LINE.match(event.get("text", "")) if event["event"] == "text" else None
+        if match and match["section"] in first_rows:
+            report.append(f"{match['section']} data => from row {first_rows[match['section']]}\n")
+        elif match:
+            report.append(f"{match['section']} data => data was not found in the source file\n")
+        else:
+            report.emit(event.pop("event"), **event)
+    tab_report.close()
+
+
+def delta_process_file(uploaded_file, previous_source, previous_output, detailed_report=False, write_only=False,
+                       max_workers=None, categorical=False, bundle_format=None, include_workbook=True):
+    """
+    Curate ``uploaded_file`` incrementally against the previous run: only funds that were added
+    or changed since ``previous_source`` go through the tab builders, and their rows replace
+    those of changed and removed funds in ``previous_output``. Returns the same tuple as
+    process_file.
+    """
+    report = ReportSink()
+    timer = StageTimer()
+    # The delta section opens the report, ahead of the source cleaning events
+    source_report = report.child()
+    current_df = source_frame(uploaded_file, source_report, detailed_report, categorical, timer, max_workers)
+    # Not a child: the previous source's sheet rows must not be attributed to the new one
+    previous_report = ReportSink()
+    previous_df = source_frame(previous_source, previous_report, False, categorical, timer, max_workers)
+    previous_report.discard()
+    with timer.stage("diff_funds", rows=len(current_df)):
+        added, changed, removed = diff_funds(previous_df, current_df)
+
+    report.append("Delta curation against the previous output\n")
+    report_funds(report, "added", added)
+    report_funds(report, "changed", changed)
+    report_funds(report, "removed", removed)
+    report.append("\n///////////////////////////////////////////////////////////////////////////\n")
+    report.merge(source_report)
+
+    # Rebuild only the added and changed funds
+    rebuilt = current_df[current_df["NAME"].isin(added + changed)]
+    tab_report = report.child()
+    delta_sheets = build_tabs(rebuilt, tab_report, max_workers=max_workers, timer=timer)
+
+    # Previous rows of changed and removed funds give way to the rebuilt rows, then every tab is
+    # put back in the order a full run writes it
+    stale = set(changed) | set(removed)
+    fund_positions = pd.Series(range(len(current_df)), index=current_df["NAME"].to_numpy())
+    fund_positions = fund_positions[~fund_positions.index.duplicated()]
+    with timer.stage("read_curated_output"):
+        previous_tabs = read_curated_output(previous_output)
+    output_sheets = {}
+    for sheet_name, previous_tab in previous_tabs.items():
+        frames = [previous_tab[~previous_tab.iloc[:, 0].isin(stale)]] if len(previous_tab.columns) else []
+        if sheet_name in delta_sheets:
+            frames.append(assemble_sheet(delta_sheets[sheet_name]))
+        merged = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        output_sheets[sheet_name] = [(0, True, order_rows(sheet_name, merged, fund_positions))]
+    for sheet_name, pieces in delta_sheets.items():
+        if sheet_name not in output_sheets:
+            output_sheets[sheet_name] = [(0, True, assemble_sheet(pieces))]
+    merge_tab_report(report, tab_report, section_first_rows(output_sheets))
+
+    return write_outputs(output_sheets, report, write_only, bundle_format, include_workbook, timer)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-curate only the funds that changed since the previous vendor drop.")
+    parser.add_argument("source", help="New source workbook")
+    parser.add_argument("--previous-source", required=True, help="Source workbook the previous output was curated from")
+    parser.add_argument("--previous-output", required=True, help="Previous curated workbook to merge into")
+    parser.add_argument("-o", "--output-dir", help="Directory for the merged workbook and report (default: next to the source)")
+    args = parser.parse_args(argv)
+
+    dest_file_path, dest_file_name, report_file_path, _ = delta_process_file(
+        args.source, args.previous_source, args.previous_output
+    )
+    target_dir = args.output_dir or os.path.dirname(os.path.abspath(args.source))
+    os.makedirs(target_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(args.source))[0]
+    shutil.move(dest_file_path, os.path.join(target_dir, f"{stem}_{dest_file_name}"))
+    shutil.move(report_file_path, os.path.join(target_dir, f"{stem}_curated_finfra1_report.txt"))
+    shutil.move(report_events_path(report_file_path), os.path.join(target_dir, f"{stem}_curated_finfra1_report.jsonl"))
+    print(os.path.join(target_dir, f"{stem}_{dest_file_name}"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
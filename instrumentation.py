@@ -0,0 +1,156 @@
+import cProfile
+import marshal
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ru_maxrss is in kilobytes on Linux and bytes on macOS
+RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+# From Python 3.12 cProfile hooks sys.monitoring, which is process-wide: one profiler sees every
+# thread, and enabling a second one while it runs raises ValueError
+PROCESS_WIDE_PROFILER = sys.version_info >= (3, 12)
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * RSS_UNIT / (1024 * 1024)
+
+
+class StageTimer:
+    """
+    Records wall time, CPU time of the calling thread, the process' peak RSS and a row count for
+    every stage of a run. When tracemalloc is tracing (``trace_memory=True`` starts it), each
+    stage also records the change in traced memory; stages that run concurrently share the
+    allocator, so treat their figures as approximate.
+
+    With ``profile=True`` the run is profiled with cProfile: one profiler per worker thread before
+    Python 3.12, one for the whole process from 3.12 (see ``profiled``); ``dump_profile`` merges
+    them into one stats file.
+
+    ``progress``, when given, is called with a stage's record as the stage starts and again once
+    it has ended (the record then has its ``wall_s``); it may be called from several threads.
+    """
+
+    def __init__(self, trace_memory=False, profile=False, progress=None):
+        self.stages = []
+        self.progress = progress
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._started_tracing = trace_memory and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+        self._profiles = [] if profile else None
+        self._shared_profile = None
+        self._profiled_blocks = 0
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """
+        Time the block as stage ``name``. The yielded dict can be updated inside the block,
+        e.g. with the row count once it is known.
+        """
+        record = {"stage": name, "rows": rows}
+        tracing = tracemalloc.is_tracing()
+        traced_before = tracemalloc.get_traced_memory()[0] if tracing else None
+        wall, cpu = time.perf_counter(), time.thread_time()
+        record["started_s"] = wall - self._origin
+        if self.progress:
+            self.progress(dict(record))
+        try:
+            yield record
+        finally:
+            record["wall_s"] = time.perf_counter() - wall
+            record["cpu_s"] = time.thread_time() - cpu
+            record["peak_rss_mb"] = peak_rss_mb()
+            if tracing:
+                record["traced_delta_mb"] = (tracemalloc.get_traced_memory()[0] - traced_before) / (1024 * 1024)
+            with self._lock:
+                self.stages.append(record)
+            if self.progress:
+                self.progress(dict(record))
+
+    @contextmanager
+    def profiled(self):
+        """
+        Profile the block on the calling thread when profiling is on; before Python 3.12 cProfile
+        only sees the thread that enabled it, so every worker thread wraps its work in this. From
+        3.12 the outermost block runs the single process-wide profiler and nested or concurrent
+        blocks join it.
+        """
+        if self._profiles is None:
+            yield
+            return
+        if PROCESS_WIDE_PROFILER:
+            with self._shared_profiler():
+                yield
+            return
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self._lock:
+                self._profiles.append(profile)
+
+    @contextmanager
+    def _shared_profiler(self):
+        with self._lock:
+            self._profiled_blocks += 1
+            if self._profiled_blocks == 1:
+                self._shared_profile = cProfile.Profile()
+                self._shared_profile.enable()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._profiled_blocks -= 1
+                if self._profiled_blocks == 0:
+                    self._shared_profile.disable()
+                    self._profiles.append(self._shared_profile)
+                    self._shared_profile = None
+
+    def dump_profile(self, target):
+        # ``target`` is a path or a binary file; returns it, or None when the run was not profiled
+        if not self._profiles:
+            return None
+        stats = pstats.Stats(self._profiles[0])
+        for profile in self._profiles[1:]:
+            stats.add(profile)
+        if isinstance(target, str):
+            stats.dump_stats(target)
+        else:
+            marshal.dump(stats.stats, target)  # what dump_stats writes
+        return target
+
+    def emit(self, report):
+        # Timing events go to the report sink in the order the stages started
+        report.append("Stage timings\n")
+        for record in sorted(self.stages, key=lambda record: record["started_s"]):
+            report.emit("timing", **record)
+
+    def close(self):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+
+def format_timing(event):
+    line = f"{event['stage']:<45} {event['wall_s']:8.3f}s wall {event['cpu_s']:8.3f}s cpu"
+    if event.get("peak_rss_mb") is not None:
+        line += f" {event['peak_rss_mb']:8.1f} MB peak RSS"
+    if event.get("traced_delta_mb") is not None:
+        line += f" {event['traced_delta_mb']:+8.1f} MB traced"
+    if event.get("rows") is not None:
+        line += f" {event['rows']:>9} rows"
+    return line
@@ -0,0 +1,163 @@
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from curate import TAB_BUILDERS
+from result_cache import cached_process_file
+
+# Curation jobs run in worker processes shared by every session on the host
+JOB_WORKERS = int(os.environ.get("FINFRA1_JOB_WORKERS", "2"))
+# Jobs queued or running at once; submit() refuses more
+JOB_QUEUE_LIMIT = int(os.environ.get("FINFRA1_JOB_QUEUE_LIMIT", "8"))
+# Finished jobs are kept this long for sessions that come back for them
+JOB_RETENTION_S = int(os.environ.get("FINFRA1_JOB_RETENTION_S", "3600"))
+
+TAB_STAGES = {builder.__name__ for builder in TAB_BUILDERS}
+
+
+class QueueFull(Exception):
+    """
+    Raised by JobQueue.submit when JOB_QUEUE_LIMIT jobs are already queued or running.
+    """
+
+
+class ProgressLog:
+    """
+    Stage progress of a job, appended as JSON Lines to a file the UI polls: a "started" line
+    when a worker picks the job up, then StageTimer's records as stages start and end.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def write(self, **fields):
+        with self._lock, open(self.path, "a", encoding="utf-8") as log:
+            log.write(json.dumps(fields, default=str) + "\n")
+
+    def stage(self, record):
+        self.write(**record)
+
+
+def read_progress(path):
+    try:
+        with open(path, encoding="utf-8") as log:
+            return [json.loads(line) for line in log if line.endswith("\n")]
+    except FileNotFoundError:
+        return []
+
+
+def run_job(data, progress_path, options):
+    # Runs in a worker process
+    progress = ProgressLog(progress_path)
+    progress.write(stage="started")
+    return cached_process_file(data, progress=progress.stage, **options)
+
+
+def summarize_progress(events, done=False):
+    """
+    (fraction, label) of a job from its progress events: reading the source is the first fifth,
+    the tab builders share the next three fifths and writing the outputs the last fifth.
+    """
+    if done:
+        return 1.0, "Done"
+    if not events:
+        return 0.0, "Queued"
+    started = {event["stage"] for event in events}
+    finished = {event["stage"] for event in events if "wall_s" in event}
+    tabs_done = len(TAB_STAGES & finished)
+    if tabs_done == len(TAB_STAGES):
+        return 0.8, "Writing outputs"
+    if TAB_STAGES & started:
+        return 0.2 + 0.6 * tabs_done / len(TAB_STAGES), f"Building tabs ({tabs_done}/{len(TAB_STAGES)})"
+    return 0.0, "Reading the source"
+
+
+class Job:
+    def __init__(self, job_id, future, progress_path):
+        self.id = job_id
+        self.future = future
+        self.progress_path = progress_path
+        self.finished_at = None
+
+    def done(self):
+        return self.future.done()
+
+    def status(self):
+        if self.future.cancelled():
+            return "cancelled"
+        if self.future.done():
+            return "failed" if self.future.exception() else "done"
+        return "running" if os.path.exists(self.progress_path) else "queued"
+
+    def progress(self):
+        return summarize_progress(read_progress(self.progress_path), self.status() == "done")
+
+    def stages(self):
+        # Finished stages so far, as StageTimer records
+        return [event for event in read_progress(self.progress_path) if "wall_s" in event]
+
+    def result(self):
+        # process_file's tuple; raises the job's exception if it failed
+        return self.future.result()
+
+
+class JobQueue:
+    """
+    Bounded pool of worker processes for curation jobs. Jobs are looked up by ID, so a session
+    finds its job again on every rerun; at most ``limit`` jobs wait or run at once, and
+    finished jobs are forgotten ``retention_s`` seconds after they end.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, limit=JOB_QUEUE_LIMIT, retention_s=JOB_RETENTION_S):
+        # Spawned workers: forking the multi-threaded Streamlit server is not safe. Workers import
+        # the Streamlit script as __mp_main__, where the uploader is empty and nothing is submitted.
+        self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        self.limit = limit
+        self.retention_s = retention_s
+        self.progress_dir = tempfile.mkdtemp(prefix="finfra1_jobs_")
+        self.jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, data, **options):
+        """
+        Queue cached_process_file(data, **options) and return the job ID. Raises QueueFull when
+        ``limit`` jobs are already queued or running.
+        """
+        with self._lock:
+            self._prune()
+            if sum(not job.done() for job in self.jobs.values()) >= self.limit:
+                raise QueueFull(f"{self.limit} curation jobs are already queued or running")
+            job_id = uuid.uuid4().hex
+            progress_path = os.path.join(self.progress_dir, f"{job_id}.jsonl")
+            future = self.executor.submit(run_job, data, progress_path, options)
+            job = self.jobs[job_id] = Job(job_id, future, progress_path)
+            future.add_done_callback(lambda _: setattr(job, "finished_at", time.monotonic()))
+            return job_id
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        # Only jobs still waiting for a worker can be cancelled
+        job = self.get(job_id)
+        return job.future.cancel() if job else False
+
+    def _prune(self):
+        now = time.monotonic()
+        for job_id, job in list(self.jobs.items()):
+            if job.finished_at is not None and now - job.finished_at > self.retention_s:
+                del self.jobs[job_id]
+                if os.path.exists(job.progress_path):
+                    os.remove(job.progress_path)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        shutil.rmtree(self.progress_dir, ignore_errors=True)
@@ -0,0 +1,162 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from curate import build_tabs, categorize_columns, dump_run_profile, read_source_sheets, write_outputs
+from delta import row_hashes
+from instrumentation import StageTimer
+from report_sink import ReportSink
+
+# Source columns that identify a fund across files
+DEDUPE_KEYS = {
+    "name": ["NAME"],
+    "name_vintage": ["NAME", "VINTAGE / INCEPTION YEAR"],
+}
+
+# Which file's rows a fund keeps when it appears in several files: the first or last file in upload
+# order, or the one whose rows fill the most cells (ties go to the earlier file)
+CONFLICT_RULES = ["first", "last", "most_complete"]
+
+
+def read_sources(uploaded_files, report, detailed_report=False, timer=None, max_workers=None):
+    """
+    Read and clean every default sheet of each (file name, file) in ``uploaded_files``, the
+    files concurrently on a thread pool. Each file reports to a child sink under its own
+    heading; returns [(file name, [(sheet name, source_df)])] in upload order.
+    """
+    timer = timer or StageTimer()
+    file_reports = [report.child() for _ in uploaded_files]
+
+    def read_file(upload, file_report):
+        file_name, uploaded_file = upload
+        file_report.append(f'Source file "{file_name}"\n')
+        with timer.profiled():
+            return file_name, read_source_sheets(uploaded_file, file_report, detailed_report, timer, max_workers)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        sources = list(executor.map(read_file, uploaded_files, file_reports))
+    for file_report in file_reports:
+        report.merge(file_report)
+    return sources
+
+
+def dedupe_funds(source_df, file_ids, key_columns, conflict_rule="first"):
+    """
+    Pick one file per fund. Rows are indexed by the hash of their ``key_columns`` values; a fund
+    found in several files keeps only the rows of the file ``conflict_rule`` picks (see
+    CONFLICT_RULES), including any duplicates within that file. Rows without a NAME are always
+    kept. Returns (keep mask, duplicates) where duplicates has one row per fund found in more
+    than one file: key hash, NAME, files, kept file and whether the files' rows differ.
+    """
+    if conflict_rule not in CONFLICT_RULES:
+        raise ValueError(f"Unknown conflict rule '{conflict_rule}', expected one of {CONFLICT_RULES}")
+    named = (source_df["NAME"].notna() & (source_df["NAME"] != "")).to_numpy()
+    rows = pd.DataFrame({
+        "key": row_hashes(source_df, key_columns).to_numpy(),
+        "file": file_ids,
+        "filled": source_df.notna().sum(axis=1).to_numpy(),
+        "content": row_hashes(source_df, list(source_df.columns)).to_numpy(),
+        "position": np.arange(len(source_df)),
+    })[named]
+
+    # One entry per fund and file, then the files of every fund found in more than one
+    per_file = rows.groupby(["key", "file"], sort=False).agg(
+        filled=("filled", "max"), content=("content", tuple), position=("position", "first"),
+    ).reset_index()
+    per_file = per_file[per_file.duplicated("key", keep=False)]
+    if per_file.empty:
+        return np.ones(len(source_df), dtype=bool), pd.DataFrame(columns=["key", "NAME", "files", "kept", "conflict"])
+
+    order = {
+        "first": (["key", "file"], [True, True]),
+        "last": (["key", "file"], [True, False]),
+        "most_complete": (["key", "filled", "file"], [True, False, True]),
+    }[conflict_rule]
+    kept = per_file.sort_values(order[0], ascending=order[1]).drop_duplicates("key").set_index("key")["file"]
+
+    # Rows of a duplicated fund survive only in its kept file
+    row_kept = kept.reindex(rows["key"]).to_numpy()
+    dropped = rows.index[~np.isnan(row_kept) & (row_kept != rows["file"].to_numpy())]
+    keep = np.ones(len(source_df), dtype=bool)
+    keep[dropped] = False
+
+    funds = per_file.groupby("key", sort=False)
+    duplicates = pd.DataFrame({
+        "NAME": source_df["NAME"].to_numpy()[funds["position"].first().to_numpy()],
+        "files": funds["file"].agg(list),
+        "kept": kept,
+        "conflict": funds["content"].nunique() > 1,
+    }).reset_index()
+    return keep, duplicates
+
+
+def report_merge(report, file_names, file_rows, file_kept, duplicates, key_columns, conflict_rule):
+    report.append(f'Merged {len(file_names)} source files, funds matched by {" + ".join(key_columns)}, '
+                  f'"{conflict_rule}" file kept on conflicts\n')
+    for file_name, rows, kept in zip(file_names, file_rows, file_kept):
+        report.emit("source_file", file=file_name, rows=int(rows), kept=int(kept))
+    conflicts = int(duplicates["conflict"].sum())
+    report.append(f"\nFunds in more than one file: {len(duplicates)} ({conflicts} with differing values)")
+    for duplicate in duplicates.itertuples(index=False):
+        report.emit("duplicate_fund", fund=duplicate.NAME, files=[file_names[file] for file in duplicate.files],
+                    kept=file_names[int(duplicate.kept)], conflict=bool(duplicate.conflict))
+    report.append("\n///////////////////////////////////////////////////////////////////////////\n")
+
+
+def merge_process_files(uploaded_files, dedupe_key="name", conflict_rule="first", detailed_report=False,
+                        write_only=False, max_workers=None, categorical=False, bundle_format=None,
+                        include_workbook=True, trace_memory=False, profile=False, progress=None, in_memory=False):
+    """
+    Curate several source files into one workbook. ``uploaded_files`` is a list of (file name,
+    file); their funds are merged, deduplicated by ``dedupe_key`` (see DEDUPE_KEYS) with
+    ``conflict_rule`` (see dedupe_funds), and the report records which file and sheet every row
+    came from. Returns the same as process_file.
+    """
+    if dedupe_key not in DEDUPE_KEYS:
+        raise ValueError(f"Unknown dedupe key '{dedupe_key}', expected one of {list(DEDUPE_KEYS)}")
+    key_columns = DEDUPE_KEYS[dedupe_key]
+    report = ReportSink()
+    timer = StageTimer(trace_memory=trace_memory, profile=profile, progress=progress)
+
+    try:
+        with timer.profiled():
+            sources = read_sources(uploaded_files, report, detailed_report, timer, max_workers)
+            file_names = [file_name for file_name, _ in sources]
+
+            # Rows of every file and sheet, labelled by their position in the merged frame; the
+            # report maps them back to each sheet's row labels
+            frames, file_ids, first_row = [], [], 0
+            for file_id, (file_name, sheets) in enumerate(sources):
+                for sheet, df in sheets:
+                    report.source_sheet(f"{file_name}/{sheet}", first_row, df.index)
+                    frames.append(df)
+                    file_ids.append(np.full(len(df), file_id))
+                    first_row += len(df)
+            if not frames:
+                raise ValueError("No source sheet found in the uploaded files")
+            with timer.stage("merge_source_files", rows=first_row):
+                source_df = pd.concat(frames, ignore_index=len(frames) > 1)
+                file_ids = np.concatenate(file_ids)
+            for col in key_columns:
+                if col not in source_df.columns:
+                    raise ValueError(f"Column '{col}' not found in the uploaded files")
+
+            with timer.stage("dedupe_funds", rows=first_row) as stage:
+                keep, duplicates = dedupe_funds(source_df, file_ids, key_columns, conflict_rule)
+                stage["rows"] = int(keep.sum())
+            file_rows = np.bincount(file_ids, minlength=len(file_names))
+            file_kept = np.bincount(file_ids[keep], minlength=len(file_names))
+            report_merge(report, file_names, file_rows, file_kept, duplicates, key_columns, conflict_rule)
+            source_df = source_df[keep]
+
+            if categorical:
+                with timer.stage("categorize_columns", rows=len(source_df)):
+                    source_df = categorize_columns(source_df)
+            output_sheets = build_tabs(source_df, report, max_workers=max_workers, timer=timer)
+
+            outputs = write_outputs(output_sheets, report, write_only, bundle_format, include_workbook, timer, in_memory)
+    finally:
+        timer.close()
+        report.close()
+    return dump_run_profile(timer, outputs, in_memory)
@@ -0,0 +1,60 @@
+import os
+import shutil
+import tempfile
+import threading
+
+# Outputs stay in memory up to this size; larger ones spill to an anonymous temp file, which the OS
+# removes once it is closed, garbage collected or its process exits
+SPOOL_MAX_BYTES = int(os.environ.get("FINFRA1_SPOOL_MAX_MB", "32")) * 1024 * 1024
+
+
+def spooled_file(mode="w+b", max_bytes=SPOOL_MAX_BYTES):
+    # Text spools (mode "w+") are UTF-8 and write newlines untranslated. A max_size of 0 would
+    # never spill, so a zero limit spills on the first write instead.
+    max_size = max(max_bytes, 1)
+    if "b" in mode:
+        return tempfile.SpooledTemporaryFile(max_size=max_size, mode=mode)
+    return tempfile.SpooledTemporaryFile(max_size=max_size, mode=mode, encoding="utf-8", newline="")
+
+
+def save_spool(spool, path):
+    """
+    Copy a spool's whole content to ``path`` and close the spool.
+    """
+    spool.seek(0)
+    binary = "b" in getattr(spool, "mode", "b")
+    with open(path, "wb" if binary else "w", **({} if binary else {"encoding": "utf-8", "newline": ""})) as target:
+        shutil.copyfileobj(spool, target)
+    spool.close()
+
+
+class OutputPayload:
+    """
+    One output file read once for downloading: its bytes when it fits in SPOOL_MAX_BYTES, otherwise
+    a copy in an anonymous temp file that stays valid if the file itself is removed (e.g. evicted
+    from the result cache) and goes away with this object.
+    """
+
+    def __init__(self, path, max_bytes=SPOOL_MAX_BYTES):
+        self._bytes = self._file = None
+        self._lock = threading.Lock()
+        with open(path, "rb") as source:
+            if os.fstat(source.fileno()).st_size <= max_bytes:
+                self._bytes = source.read()
+            else:
+                self._file = tempfile.TemporaryFile()
+                shutil.copyfileobj(source, self._file)
+
+    def download_data(self):
+        # For st.download_button: the bytes, or a callable that reads the temp file when clicked
+        return self._bytes if self._file is None else self._read_file
+
+    def _read_file(self):
+        # Download callables run on their own threads
+        with self._lock:
+            self._file.seek(0)
+            return self._file.read()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
@@ -0,0 +1,185 @@
+import json
+import os
+import shutil
+
+import numpy as np
+
+from instrumentation import format_timing
+from output_spool import spooled_file
+
+
+def row_ranges(rows):
+    """
+    Collapse sorted row numbers into [start, end] pairs of consecutive rows.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    if len(rows) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(rows) != 1)
+    starts = np.concatenate(([0], breaks + 1))
+    ends = np.concatenate((breaks, [len(rows) - 1]))
+    return [[int(rows[start]), int(rows[end])] for start, end in zip(starts, ends)]
+
+
+def format_row_ranges(ranges, limit=10):
+    """
+    Render [start, end] pairs as "5-9, 12, 17-20", keeping the first ``limit`` ranges.
+    """
+    parts = [f"{start}-{end}" if end > start else f"{start}" for start, end in ranges[:limit]]
+    return ', '.join(parts) + (' ...' if len(ranges) > limit else '')
+
+
+def render_event(event):
+    kind = event["event"]
+    if kind == "replacement":
+        # Rows of a multi-sheet source are shown as "<sheet> <row within the sheet>"
+        rows = [f"{sheet} {row}" for sheet, row in event["sheet_rows"]] if "sheet_rows" in event else event["rows"]
+        rows_str = ', '.join(map(str, rows[:5])) + (' ...' if len(rows) > 5 else '')
+        return f"'{event['original']}': '{event['replacement']}' => {event['count']} replacements (rows {rows_str})"
+    if kind == "deletion":
+        where = f'"{event["value"]}" deleted, "{event["tab"]}" tab, column "{event["column"]}"'
+        if "row" in event:
+            return f"{where}, row {event['row']}"
+        return f"{where}, {event['count']} cells (rows {format_row_ranges(event['rows'])})"
+    if kind == "skipped_rows":
+        return f'{event["reason"]} skipped, "{event["tab"]}" tab, {event["count"]} rows (rows {format_row_ranges(event["rows"])})'
+    if kind == "source_sheet":
+        if "first_label" not in event:  # reports written before sheets kept their row labels
+            last_row = event["first_row"] + event["rows"] - 1
+            return f"\"{event['sheet']}\" => {event['rows']} rows (source rows {event['first_row']}-{last_row})"
+        if not event["rows"]:
+            return f"\"{event['sheet']}\" => 0 rows"
+        # Excel rows, like the skipped rows and deletions; the event keeps the row labels
+        first_row, last_row = event["first_label"] + 2, event["last_label"] + 2
+        return f"\"{event['sheet']}\" => {event['rows']} rows (Excel rows {first_row}-{last_row})"
+    if kind == "timing":
+        return format_timing(event)
+    if kind == "delta":
+        return f"    {event['fund']}"
+    if kind == "source_file":
+        return f"\"{event['file']}\" => {event['rows']} rows, {event['kept']} kept"
+    if kind == "duplicate_fund":
+        conflict = ", values differ" if event["conflict"] else ""
+        return f"    {event['fund']}: {', '.join(event['files'])} => kept \"{event['kept']}\"{conflict}"
+    return event["text"]
+
+
+class ReportSink:
+    """
+    Run report streamed as JSON Lines as it is written, one event per line. Plain text lines
+    (headings, column lists) are "text" events; replacements and deleted sentinel values carry
+    their tab, column, values, count and rows so the events can be queried. The events are
+    spooled (see output_spool), so a run leaves no file behind unless it saves them, and the
+    .txt report is rendered from them at the end of the run.
+    """
+
+    def __init__(self, sheet_ranges=None):
+        self._file = spooled_file("w+")
+        # (sheet, first row) of each source sheet merged into the source frame
+        self.sheet_ranges = sheet_ranges if sheet_ranges is not None else []
+
+    def emit(self, event, **fields):
+        self._file.write(json.dumps({"event": event, **fields}, default=str) + "\n")
+
+    # List-style interface for free-text lines
+    def append(self, text):
+        self.emit("text", text=str(text))
+
+    def extend(self, lines):
+        for text in lines:
+            self.append(text)
+
+    def source_sheet(self, sheet, first_row, labels):
+        """
+        Record a source sheet whose rows start at position ``first_row`` of the merged source
+        frame. ``labels`` is the sheet frame's index: Excel row - 2, the row labels replacements
+        report (see iter_source_raw_chunks).
+        """
+        labels = np.asarray(labels)
+        self.sheet_ranges.append((sheet, first_row, labels))
+        bounds = {"first_label": int(labels[0]), "last_label": int(labels[-1])} if len(labels) else {}
+        self.emit("source_sheet", sheet=sheet, first_row=first_row, rows=len(labels), **bounds)
+
+    def sheet_row(self, row):
+        # (sheet, row label within that sheet) of a row of the merged source frame
+        for sheet, first_row, labels in reversed(self.sheet_ranges):
+            if row >= first_row:
+                return [sheet, int(labels[row - first_row])]
+        return [None, row]
+
+    def replacement(self, tab, column, original, replacement, count, rows):
+        fields = {}
+        if len(self.sheet_ranges) > 1:
+            fields["sheet_rows"] = [self.sheet_row(row) for row in rows]
+        self.emit("replacement", tab=tab, column=column, original=original, replacement=replacement,
+                  count=int(count), rows=list(rows), **fields)
+
+    def deletion(self, tab, column, value, rows):
+        self.emit("deletion", tab=tab, column=column, value=value, count=len(rows), rows=row_ranges(rows))
+
+    def skipped_rows(self, tab, reason, rows):
+        self.emit("skipped_rows", tab=tab, reason=reason, count=len(rows), rows=row_ranges(rows))
+
+    def deleted_cell(self, tab, column, value, row):
+        self.emit("deletion", tab=tab, column=column, value=value, count=1, row=int(row))
+
+    def child(self):
+        # Separate sink for work that runs concurrently; merge() appends it back in order
+        return ReportSink(sheet_ranges=self.sheet_ranges)
+
+    def merge(self, other):
+        other._file.seek(0)
+        shutil.copyfileobj(other._file, self._file)
+        other.close()
+
+    def discard(self):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    def events(self):
+        self._file.seek(0)
+        try:
+            for line in self._file:
+                yield json.loads(line)
+        finally:
+            self._file.seek(0, os.SEEK_END)
+
+    def save_events(self, target):
+        """
+        Copy the JSON Lines events to ``target``, a path or a text file.
+        """
+        if isinstance(target, str):
+            with open(target, "w", encoding="utf-8", newline="") as events:
+                return self.save_events(events)
+        self._file.seek(0)
+        shutil.copyfileobj(self._file, target)
+        self._file.seek(0, os.SEEK_END)
+
+    def render(self, target):
+        """
+        Write the human-readable report to ``target``, a path or a text file.
+        """
+        if isinstance(target, str):
+            with open(target, "w", encoding="utf-8", newline="") as text:
+                return self.render(text)
+        for number, event in enumerate(self.events()):
+            if number:
+                target.write("\n")
+            target.write(render_event(event))
+
+
+def report_events_path(report_file_path):
+    # The JSON Lines events always sit next to the rendered .txt report
+    return os.path.splitext(report_file_path)[0] + '.jsonl'
+
+
+def read_events(report_file_path, event=None):
+    """
+    Events of a finished run, read back from the .jsonl next to its .txt report; ``event``
+    keeps only one kind (e.g. "timing").
+    """
+    with open(report_events_path(report_file_path), encoding="utf-8") as events:
+        records = (json.loads(line) for line in events)
+        return [record for record in records if event is None or record["event"] == event]
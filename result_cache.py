@@ -0,0 +1,149 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+
+from curate import MAPPINGS_VERSION, process_file
+from merge_sources import merge_process_files
+from output_spool import save_spool
+
+# On-disk cache of curated outputs, shared by every session on the host
+CACHE_DIR = os.environ.get("FINFRA1_CACHE_DIR", os.path.join(tempfile.gettempdir(), "finfra1_cache"))
+CACHE_MAX_BYTES = int(os.environ.get("FINFRA1_CACHE_MAX_MB", "1024")) * 1024 * 1024
+
+WORKBOOK_FILE = "curated.xlsx"
+REPORT_FILE = "report.txt"
+REPORT_EVENTS_FILE = "report.jsonl"
+PROFILE_FILE = "report.prof"
+BUNDLE_FILE = "bundle.zip"
+META_FILE = "meta.json"
+
+
+def cache_key(data, **options):
+    """
+    Content address of a curation run: the upload bytes, the mapping-table version and
+    any process_file options that change the output. ``data`` is the bytes of one upload, or a
+    list of (file name, bytes) for a merged run, keyed by every name and digest in order.
+    """
+    if isinstance(data, list):
+        digest = hashlib.sha256()
+        for file_name, file_data in data:
+            digest.update(json.dumps([file_name, hashlib.sha256(file_data).hexdigest()]).encode("utf-8"))
+    else:
+        digest = hashlib.sha256(data)
+    digest.update(MAPPINGS_VERSION.encode("utf-8"))
+    digest.update(json.dumps(options, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def entry_size(entry_dir):
+    return sum(
+        os.path.getsize(os.path.join(entry_dir, name))
+        for name in os.listdir(entry_dir)
+        if os.path.isfile(os.path.join(entry_dir, name))
+    )
+
+
+def evict(cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, keep=None):
+    """
+    Remove least recently used entries until the cache fits in ``max_bytes``. Entries are
+    ordered by directory mtime, which is refreshed on every hit; ``keep`` is never removed.
+    """
+    entries = []
+    for name in os.listdir(cache_dir):
+        entry_dir = os.path.join(cache_dir, name)
+        # Skip entries still being written
+        if name.startswith(".") or not os.path.isdir(entry_dir):
+            continue
+        try:
+            entries.append((os.path.getmtime(entry_dir), entry_size(entry_dir), name))
+        except FileNotFoundError:
+            continue  # evicted by another session meanwhile
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= max_bytes:
+            break
+        if name == keep:
+            continue
+        shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+        total -= size
+
+
+def lookup(key, cache_dir=CACHE_DIR):
+    entry_dir = os.path.join(cache_dir, key)
+    try:
+        with open(os.path.join(entry_dir, META_FILE), encoding="utf-8") as meta_file:
+            meta = json.load(meta_file)
+        os.utime(entry_dir)  # mark as recently used
+    except (FileNotFoundError, ValueError):
+        return None
+    return (
+        os.path.join(entry_dir, WORKBOOK_FILE) if meta.get("workbook", True) else None,
+        meta["dest_file_name"],
+        os.path.join(entry_dir, REPORT_FILE),
+        os.path.join(entry_dir, BUNDLE_FILE) if meta.get("bundle") else None,
+    )
+
+
+def store(key, outputs, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+    """
+    Save the SpooledOutputs of an in-memory process_file run as the entry for ``key``, closing the
+    spools. Returns the entry as lookup does.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+
+    # Build the entry in a hidden staging directory and rename it into place, so concurrent
+    # sessions never see a half-written entry
+    staging_dir = tempfile.mkdtemp(prefix=f".{key}.", dir=cache_dir)
+    files = [
+        (outputs.workbook, WORKBOOK_FILE),
+        (outputs.report, REPORT_FILE),
+        (outputs.report_events, REPORT_EVENTS_FILE),
+        (outputs.profile, PROFILE_FILE),
+        (outputs.bundle, BUNDLE_FILE),
+    ]
+    meta = {
+        "dest_file_name": outputs.dest_file_name,
+        "mappings_version": MAPPINGS_VERSION,
+        "workbook": outputs.workbook is not None,
+        "bundle": outputs.bundle is not None,
+    }
+    try:
+        for spool, name in files:
+            if spool is not None:
+                save_spool(spool, os.path.join(staging_dir, name))
+        with open(os.path.join(staging_dir, META_FILE), "w", encoding="utf-8") as meta_file:
+            json.dump(meta, meta_file)
+    except BaseException:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+    try:
+        os.rename(staging_dir, os.path.join(cache_dir, key))
+    except OSError:
+        shutil.rmtree(staging_dir, ignore_errors=True)  # another session stored it first
+
+    evict(cache_dir, max_bytes, keep=key)
+    return lookup(key, cache_dir)
+
+
+def cached_process_file(data, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, progress=None, **options):
+    """
+    process_file for raw upload bytes, served from the on-disk cache when the same bytes were
+    already curated with the current mapping tables and options. Returns the same tuple as process_file.
+    ``progress`` is passed on to process_file and is not part of the cache key. A list of
+    (file name, bytes) is curated into one workbook by merge_process_files.
+    """
+    key = cache_key(data, **options)
+    cached = lookup(key, cache_dir)
+    if cached:
+        return cached
+    # Spooled outputs go straight into the entry; no temp files are left if the run fails
+    if isinstance(data, list):
+        uploads = [(file_name, io.BytesIO(file_data)) for file_name, file_data in data]
+        outputs = merge_process_files(uploads, progress=progress, in_memory=True, **options)
+    else:
+        outputs = process_file(io.BytesIO(data), progress=progress, in_memory=True, **options)
+    return store(key, outputs, cache_dir=cache_dir, max_bytes=max_bytes)
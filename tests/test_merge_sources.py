@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from merge_sources import DEDUPE_KEYS, dedupe_funds
+
+KEY = DEDUPE_KEYS["name"]
+
+
+def sources(*files):
+    # One frame from per-file row lists of (NAME, SIZE), plus the file id of every row
+    rows = [row for file in files for row in file]
+    file_ids = np.concatenate([np.full(len(file), file_id) for file_id, file in enumerate(files)])
+    return pd.DataFrame(rows, columns=["NAME", "SIZE"], dtype=object), file_ids
+
+
+def test_no_duplicates_keeps_everything():
+    df, file_ids = sources([("Fund A", "1")], [("Fund B", "2")])
+    keep, duplicates = dedupe_funds(df, file_ids, KEY)
+    assert keep.tolist() == [True, True]
+    assert duplicates.empty
+    assert list(duplicates.columns) == ["key", "NAME", "files", "kept", "conflict"]
+
+
+@pytest.mark.parametrize("rule, keep_rows, kept", [
+    ("first", [True, True, False], 0),
+    ("last", [False, True, True], 1),
+])
+def test_first_and_last(rule, keep_rows, kept):
+    df, file_ids = sources([("Fund A", "1"), ("Fund B", "2")], [("Fund A", "3")])
+    keep, duplicates = dedupe_funds(df, file_ids, KEY, rule)
+    assert keep.tolist() == keep_rows
+    assert duplicates[["NAME", "files", "kept", "conflict"]].values.tolist() == [["Fund A", [0, 1], kept, True]]
+
+
+def test_most_complete_prefers_filled_rows():
+    df, file_ids = sources([("Fund A", None)], [("Fund A", "3")])
+    keep, duplicates = dedupe_funds(df, file_ids, KEY, "most_complete")
+    assert keep.tolist() == [False, True]
+    assert duplicates["kept"].tolist() == [1]
+
+
+def test_most_complete_tie_keeps_earlier_file():
+    df, file_ids = sources([("Fund A", "1")], [("Fund A", "3")])
+    keep, duplicates = dedupe_funds(df, file_ids, KEY, "most_complete")
+    assert keep.tolist() == [True, False]
+    assert duplicates["kept"].tolist() == [0]
+
+
+def test_identical_rows_are_not_a_conflict():
+    df, file_ids = sources([("Fund A", "1")], [("Fund A", "1")])
+    _, duplicates = dedupe_funds(df, file_ids, KEY)
+    assert duplicates["conflict"].tolist() == [False]
+
+
+def test_duplicates_within_the_kept_file_survive():
+    df, file_ids = sources([("Fund A", "1"), ("Fund A", "2")], [("Fund A", "3")])
+    keep, duplicates = dedupe_funds(df, file_ids, KEY)
+    assert keep.tolist() == [True, True, False]
+    assert len(duplicates) == 1
+
+
+def test_duplicates_within_one_file_only_are_kept():
+    df, file_ids = sources([("Fund A", "1"), ("Fund A", "2")], [("Fund B", "3")])
+    keep, duplicates = dedupe_funds(df, file_ids, KEY)
+    assert keep.all()
+    assert duplicates.empty
+
+
+def test_rows_without_name_are_kept():
+    df, file_ids = sources([(None, "1"), ("", "2")], [(None, "1"), ("", "2")])
+    keep, duplicates = dedupe_funds(df, file_ids, KEY, "last")
+    assert keep.all()
+    assert duplicates.empty
+
+
+def test_vintage_key_separates_funds():
+    df = pd.DataFrame({"NAME": ["Fund A", "Fund A"], "VINTAGE / INCEPTION YEAR": ["2019", "2020"]}, dtype=object)
+    keep, duplicates = dedupe_funds(df, np.array([0, 1]), DEDUPE_KEYS["name_vintage"])
+    assert keep.all()
+    assert duplicates.empty
+
+
+def test_unknown_rule():
+    df, file_ids = sources([("Fund A", "1")])
+    with pytest.raises(ValueError, match="Unknown conflict rule"):
+        dedupe_funds(df, file_ids, KEY, "newest")
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from curate import apply_replacements, compile_mapping
+
+# England reaches 'United Kingdom' through two keys, and 'A' -> 'B' -> 'C' chains three deep
+CHAINED = {
+    "England": "United Kingdom",
+    "UK": "United Kingdom",
+    "United Kingdom": "United Kingdom",
+    "A": "B",
+    "B": "C",
+    "Unused": "Nothing",
+}
+
+
+def replace_loop(series, replacements, column):
+    # The original per-key loop apply_replacements stands in for
+    notes = {}
+    for original, replacement in replacements.items():
+        count = series.value_counts().get(original, 0)
+        if count > 0:
+            rows = series.index[series == original].tolist()
+            notes[original] = (replacement, int(count), rows[:6], column)
+        series = series.replace(original, replacement)
+    return series, notes
+
+
+def check_against_loop(series, replacements=CHAINED):
+    notes = {}
+    result = apply_replacements(series, compile_mapping(replacements), notes)
+    expected, expected_notes = replace_loop(series.astype(object), replacements, series.name)
+    pd.testing.assert_series_equal(result.astype(object), expected, check_dtype=False)
+    assert notes == expected_notes
+    return result
+
+
+def test_chained_keys():
+    series = pd.Series(["England", "UK", "United Kingdom", "France", "A", "B", "England"] * 2, name="COUNTRY")
+    result = check_against_loop(series)
+    assert result.tolist().count("United Kingdom") == 8
+    assert result.tolist().count("C") == 4
+
+
+def test_missing_values():
+    series = pd.Series(["England", np.nan, None, "A", np.nan, "France"], index=range(10, 16), name="COUNTRY")
+    result = check_against_loop(series)
+    assert result.isna().tolist() == [False, True, True, False, True, False]
+
+
+def test_more_than_six_rows():
+    series = pd.Series(["England", "UK"] * 8, name="COUNTRY")
+    check_against_loop(series)
+
+
+def test_categorical_input():
+    values = ["England", "UK", np.nan, "France", "B", "England"]
+    series = pd.Series(pd.Categorical(values, categories=["England", "UK", "France", "B", "Unused"]), name="COUNTRY")
+    result = check_against_loop(series)
+    assert isinstance(result.dtype, pd.CategoricalDtype)
+    # England and UK collapse onto one category; the unused one keeps its replacement
+    assert result.cat.categories.tolist() == ["United Kingdom", "France", "C", "Nothing"]
+
+
+def test_no_match_returns_input():
+    series = pd.Series(["France", "Spain"], name="COUNTRY")
+    notes = {}
+    assert apply_replacements(series, compile_mapping(CHAINED), notes) is series
+    assert notes == {}
+
+
+@pytest.mark.parametrize("index", [[0, 0, 1, 1, 2], [4, 3, 2, 1, 0]])
+def test_repeated_row_labels(index):
+    # Exploded geography tokens repeat their row label; each row is listed once per note
+    series = pd.Series(["England", "England", "UK", "France", "England"], index=index, name="COUNTRY")
+    notes = {}
+    apply_replacements(series, compile_mapping(CHAINED), notes)
+    expected_rows = list(dict.fromkeys(i for i, value in zip(index, series) if value == "England"))
+    assert notes["England"][:3] == ("United Kingdom", 3, expected_rows)
@@ -0,0 +1,40 @@
+from curate import PREAMBLE_MARKER, scan_source_layout
+
+HEADER = ["ID", "NAME", "VINTAGE / INCEPTION YEAR"]
+
+
+def test_empty_sheet():
+    assert scan_source_layout([]) == (0, 0)
+
+
+def test_header_on_first_row():
+    assert scan_source_layout([HEADER, ["1", "Fund A", "2019"]]) == (0, 0)
+
+
+def test_header_below_title_rows():
+    rows = [["Vendor export"], [None, None], HEADER, ["1", "Fund A", "2019"]]
+    assert scan_source_layout(rows) == (2, 0)
+
+
+def test_no_name_row_keeps_first_row():
+    assert scan_source_layout([["ID", "FUND"], ["1", "Fund A"]]) == (0, 0)
+
+
+def test_preamble_ends_at_marker():
+    rows = [["Vendor export"], HEADER, ["", "Notes", ""], ["", PREAMBLE_MARKER, "12"], ["1", "Fund A", "2019"]]
+    assert scan_source_layout(rows) == (1, 2)
+
+
+def test_marker_outside_name_column_is_data():
+    rows = [HEADER, [PREAMBLE_MARKER, "Fund A", "2019"], ["1", "Fund B", "2020"]]
+    assert scan_source_layout(rows) == (0, 0)
+
+
+def test_marker_row_shorter_than_name_column():
+    rows = [HEADER, ["1"], ["", PREAMBLE_MARKER], ["2", "Fund A", "2019"]]
+    assert scan_source_layout(rows) == (0, 2)
+
+
+def test_marker_above_header_is_ignored():
+    rows = [["", PREAMBLE_MARKER], HEADER, ["1", "Fund A", "2019"]]
+    assert scan_source_layout(rows) == (1, 0)